@@ -0,0 +1,184 @@
+from sqlalchemy import create_engine, select, func, inspect, case
+from sqlalchemy.engine import Engine
+from models import Actor, Movie, GameResult, actor_movies
+from db_service import ROSTER_SIZE
+from typing import Dict, Optional
+import argparse
+import logging
+import os
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TIERS = ('easy', 'medium', 'hard')
+SOLVE_RATE_PRIOR_GAMES = 5  # Pseudo-games pulling sparse solve rates toward the global rate
+FEATURE_NAMES = ('roster_min_revenue', 'roster_revenue_spread', 'year_span', 'popularity',
+                 'solve_rate', 'games_played')
+
+# Weights of each standardized feature in the difficulty score (higher is harder)
+DIFFICULTY_WEIGHTS = {
+    'roster_min_revenue': -1.0,  # A low-grossing fifth movie is hard to name
+    'roster_revenue_spread': 0.5,
+    'year_span': 0.5,
+    'popularity': -1.0,
+    'solve_rate': -2.0,
+}
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+
+
+def _roster_stats(conn):
+    """Per-actor revenue and year stats over each actor's top-grossing roster"""
+    rows = conn.execute(
+        select(actor_movies.c.actor_id, actor_movies.c.movie_id, Movie.revenue, Movie.release_year)
+        .join(Movie, Movie.tmdb_id == actor_movies.c.movie_id)
+    ).all()
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, np.array([]), np.array([]), np.array([])
+
+    data = np.array([(a, m, r or 0, y if y is not None else np.nan) for a, m, r, y in rows], dtype=np.float64)
+    # Drop duplicate actor/movie links, then sort by actor, revenue descending and movie ID,
+    # the order db_service.actor_rosters deals rosters in
+    _, first = np.unique(data[:, :2], axis=0, return_index=True)
+    data = data[first]
+    order = np.lexsort((data[:, 1], -data[:, 2], data[:, 0]))
+    actor = data[order, 0].astype(np.int64)
+    revenue = data[order, 2]
+    year = data[order, 3]
+
+    _, starts, counts = np.unique(actor, return_index=True, return_counts=True)
+    rank = np.arange(len(actor)) - np.repeat(starts, counts)
+    keep = rank < ROSTER_SIZE
+    actor, revenue, year = actor[keep], revenue[keep], year[keep]
+
+    actor_ids, starts = np.unique(actor, return_index=True)
+    min_revenue = np.minimum.reduceat(revenue, starts)
+    max_revenue = np.maximum.reduceat(revenue, starts)
+    year_min = np.minimum.reduceat(np.where(np.isnan(year), np.inf, year), starts)
+    year_max = np.maximum.reduceat(np.where(np.isnan(year), -np.inf, year), starts)
+    year_span = np.where(np.isfinite(year_max - year_min), year_max - year_min, 0)
+    spread = np.log10(max_revenue + 1) - np.log10(min_revenue + 1)
+    return actor_ids, np.log10(min_revenue + 1), spread, year_span
+
+
+def _solve_history(results_engine: Optional[Engine]) -> Dict[int, tuple]:
+    """Games played and games won per actor from recorded results"""
+    if results_engine is None or not inspect(results_engine).has_table(GameResult.__tablename__):
+        return {}
+    with results_engine.connect() as conn:
+        rows = conn.execute(
+            select(GameResult.actor_id, func.count(),
+                   func.sum(case((GameResult.movies_found >= GameResult.total_movies, 1), else_=0)))
+            .where(GameResult.actor_id.isnot(None))
+            .group_by(GameResult.actor_id)
+        ).all()
+    return {actor_id: (games, wins or 0) for actor_id, games, wins in rows}
+
+
+def compute_features(catalog: Engine, results_engine: Optional[Engine] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute the per-actor feature table and difficulty tiers in one batch.
+
+    Args:
+        catalog: Engine holding actors, movies and actor_movies
+        results_engine: Engine holding game_results, for historical solve rates
+
+    Returns:
+        Dict[str, np.ndarray]: ``actor_ids``, a ``features`` matrix with columns
+        in ``FEATURE_NAMES`` order, ``score`` and ``tier`` (index into ``TIERS``)
+    """
+    with catalog.connect() as conn:
+        actor_ids, min_revenue, spread, year_span = _roster_stats(conn)
+        popularity_rows = dict(conn.execute(select(Actor.tmdb_id, Actor.popularity)).all())
+
+    popularity = np.array([popularity_rows.get(int(a)) or 0 for a in actor_ids], dtype=np.float64)
+    history = _solve_history(results_engine)
+    games = np.array([history.get(int(a), (0, 0))[0] for a in actor_ids], dtype=np.float64)
+    wins = np.array([history.get(int(a), (0, 0))[1] for a in actor_ids], dtype=np.float64)
+    global_rate = wins.sum() / games.sum() if games.sum() else 0.5
+    solve_rate = (wins + SOLVE_RATE_PRIOR_GAMES * global_rate) / (games + SOLVE_RATE_PRIOR_GAMES)
+
+    columns = {
+        'roster_min_revenue': min_revenue,
+        'roster_revenue_spread': spread,
+        'year_span': year_span.astype(np.float64),
+        'popularity': np.log1p(popularity),
+        'solve_rate': solve_rate,
+        'games_played': games,
+    }
+    features = np.column_stack([columns[name] for name in FEATURE_NAMES]) if len(actor_ids) \
+        else np.zeros((0, len(FEATURE_NAMES)))
+    score = sum(weight * _zscore(columns[name]) for name, weight in DIFFICULTY_WEIGHTS.items()) \
+        if len(actor_ids) else np.array([])
+
+    tier = np.zeros(len(actor_ids), dtype=np.int8)
+    if len(actor_ids):
+        thresholds = np.quantile(score, [1 / 3, 2 / 3])
+        tier = np.digitize(score, thresholds).astype(np.int8)
+
+    return {'actor_ids': actor_ids.astype(np.int64), 'features': features, 'score': score, 'tier': tier}
+
+
+def build_actor_features(catalog: Engine, path: str, results_engine: Optional[Engine] = None) -> str:
+    """Recompute features and atomically replace the feature file"""
+    start = time.perf_counter()
+    table = compute_features(catalog, results_engine)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, feature_names=np.array(FEATURE_NAMES), **table)
+    os.replace(tmp_path, path)
+    counts = np.bincount(table['tier'], minlength=len(TIERS))
+    logger.info(f"Built actor features for {len(table['actor_ids'])} actors "
+                f"({dict(zip(TIERS, counts.tolist()))}) in {time.perf_counter() - start:.2f}s")
+    return path
+
+
+class ActorFeatures:
+    """Loaded feature table; difficulty selection is a random pick from a precomputed array"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with np.load(path) as data:
+            self.actor_ids = data['actor_ids']
+            self.features = data['features']
+            self.tier = data['tier']
+        self._by_tier = {name: self.actor_ids[self.tier == i] for i, name in enumerate(TIERS)}
+        self._rng = np.random.default_rng()
+
+    def random_actor_id(self, difficulty: str) -> Optional[int]:
+        """Pick a random actor ID from a tier, or None if the tier is empty"""
+        candidates = self._by_tier.get(difficulty)
+        if candidates is None:
+            raise ValueError(f"Unknown difficulty: {difficulty}")
+        if not len(candidates):
+            return None
+        return int(candidates[self._rng.integers(len(candidates))])
+
+    def is_stale(self) -> bool:
+        return os.path.exists(self.path) and os.path.getmtime(self.path) != self.mtime
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Recompute actor difficulty features")
+    parser.add_argument('path', nargs='?', default=os.getenv('ACTOR_FEATURES_PATH', 'actor_features.npz'))
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in environment")
+    catalog = create_engine(database_url)
+    results_url = os.getenv('RESULTS_DATABASE_URL')
+    build_actor_features(catalog, args.path, create_engine(results_url) if results_url else catalog)
+
+
+if __name__ == "__main__":
+    main()
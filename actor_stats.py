@@ -0,0 +1,127 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import Actor, Movie, MovieLanguage
+from movie_data import MovieDataService
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Qualification thresholds shared by db_init and update_trending
+MIN_MOVIE_CREDITS = 15
+MIN_ENGLISH_RATIO = 0.7
+LANGUAGE_SAMPLE_SIZE = 20  # Number of recent credits checked for language
+STATS_MAX_AGE = timedelta(days=90)  # Stored stats older than this are recomputed by the updater
+
+
+def known_languages(session: Session, movie_ids: List[int]) -> Dict[int, str]:
+    """Get stored original languages for the given movie IDs, in or outside the catalog"""
+    if not movie_ids:
+        return {}
+    rows = session.query(MovieLanguage.tmdb_id, MovieLanguage.original_language)\
+                  .filter(MovieLanguage.tmdb_id.in_(movie_ids))\
+                  .all()
+    rows += session.query(Movie.tmdb_id, Movie.original_language)\
+                   .filter(Movie.tmdb_id.in_(movie_ids))\
+                   .filter(Movie.original_language.isnot(None))\
+                   .all()
+    return {tmdb_id: language for tmdb_id, language in rows}
+
+
+def remember_languages(session: Session, languages: Dict[int, str]) -> None:
+    """
+    Store fetched languages so later runs don't request the same movies again.
+
+    The rows are written in a savepoint and committed with the caller's
+    transaction.
+    """
+    if not languages:
+        return
+    try:
+        with session.begin_nested():
+            for tmdb_id, language in languages.items():
+                session.merge(MovieLanguage(tmdb_id=tmdb_id, original_language=language))
+    except IntegrityError:
+        # Another worker stored the same movies first; they are known either way
+        pass
+
+
+def compute_english_ratio(session: Session, movie_service: MovieDataService,
+                          credits: List[Dict], delay: float = 0) -> Optional[float]:
+    """
+    Compute the share of an actor's recent credits that are English-language films.
+
+    Languages already stored on ``Movie`` or ``MovieLanguage``, or included in
+    the credit itself, are used directly; only movies we have never seen are
+    fetched from TMDB, and their languages are stored for later runs.
+
+    Args:
+        session: Open database session
+        movie_service: Service used for the remaining detail fetches
+        credits: The ``cast`` list from a TMDB movie_credits response
+        delay (float): Seconds to sleep after each network fetch
+
+    Returns:
+        Optional[float]: Ratio between 0 and 1, or None if there are no credits
+    """
+    sample = credits[:LANGUAGE_SAMPLE_SIZE]
+    if not sample:
+        return None
+
+    stored = known_languages(session, [credit['id'] for credit in sample])
+    english_movies = 0
+    fetches = 0
+    fetched = {}
+    for credit in sample:
+        language = stored.get(credit['id']) or credit.get('original_language')
+        if language is None:
+            movie_details = movie_service.make_request(
+                "GET",
+                f"{movie_service.base_url}/movie/{credit['id']}"
+            )
+            language = movie_details.get('original_language')
+            fetches += 1
+            if language:
+                fetched[credit['id']] = language
+            if delay:
+                time.sleep(delay)
+        if language == 'en':
+            english_movies += 1
+
+    remember_languages(session, fetched)
+    logger.info(f"Language check used {len(sample) - fetches} local and {fetches} fetched movies")
+    return english_movies / len(sample)
+
+
+def stored_actor(session: Session, actor_id: int, max_age: Optional[timedelta] = None) -> Optional[Actor]:
+    """
+    Get an actor whose qualification stats are already stored.
+
+    Args:
+        session: Open database session
+        actor_id (int): TMDB person ID
+        max_age (timedelta): Treat stats computed longer ago than this as
+            missing; actors without ``stats_updated_at`` fall back to
+            ``last_updated``
+
+    Returns:
+        Optional[Actor]: The actor, or None if unknown or their stats are stale
+    """
+    query = session.query(Actor)\
+                   .filter(Actor.tmdb_id == actor_id)\
+                   .filter(Actor.movie_credit_count.isnot(None))\
+                   .filter(Actor.english_ratio.isnot(None))
+    if max_age is not None:
+        # Naive UTC, matching how the timestamps are stored
+        cutoff = datetime.utcnow() - max_age
+        query = query.filter(func.coalesce(Actor.stats_updated_at, Actor.last_updated) >= cutoff)
+    return query.first()
+
+
+def is_qualified(movie_credit_count: Optional[int], english_ratio: Optional[float]) -> bool:
+    """Check stored stats against the qualification thresholds"""
+    return (movie_credit_count is not None and movie_credit_count >= MIN_MOVIE_CREDITS and
+            english_ratio is not None and english_ratio >= MIN_ENGLISH_RATIO)
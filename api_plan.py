@@ -0,0 +1,182 @@
+from sqlalchemy.orm import Session
+from actor_stats import MIN_MOVIE_CREDITS, MIN_ENGLISH_RATIO, LANGUAGE_SAMPLE_SIZE, known_languages
+from movie_data import MovieDataService
+from collections import Counter
+from typing import Dict, List, Optional
+import math
+import os
+import statistics
+import time
+
+DEFAULT_RATE = 30.0  # TMDB requests per second, overridden by CRAWL_RATE_LIMIT
+DEFAULT_SAMPLE_SIZE = 10  # Unknown actors whose credits are fetched to calibrate estimates
+BILLED_ORDER = 10  # get_actor_movies_with_details fetches details for credits billed this high
+
+# Endpoint labels used in plans
+TRENDING = '/trending/person/week'
+POPULAR = '/person/popular'
+CREDITS = '/person/{id}/movie_credits'
+SEARCH = '/search/person'
+LANGUAGE = '/movie/{id} (language check)'
+DETAILS = '/movie/{id} (roster details)'
+
+# Tables the planner reads stored stats and languages from
+STORED_TABLES = ('actors', 'movies', 'movie_languages')
+
+
+def has_english_majority(person: Dict) -> bool:
+    """The known_for pre-filter both crawls apply before checking credits"""
+    known_for = person.get("known_for", [])
+    english_language_films = [
+        movie for movie in known_for
+        if movie.get("original_language") == "en" and movie.get("media_type") == "movie"
+    ]
+    return len(english_language_films) >= len(known_for) * 0.5
+
+
+def stored_data_usable(plan: 'ApiPlan', missing_schema: List[str]) -> bool:
+    """
+    Check the planner can read stored stats without upgrading the schema.
+
+    A database from before the stats columns existed is planned as if it had
+    no stored stats or languages, which is what the run will find once it has
+    added the columns.
+
+    Args:
+        plan: Plan to note the missing schema on
+        missing_schema: ``models.missing_schema`` for the database
+    """
+    missing = [name for name in missing_schema if name.split('.')[0] in STORED_TABLES]
+    if missing:
+        plan.notes.append(f"Schema not upgraded yet (missing {', '.join(missing)}); "
+                          f"planned without stored stats or languages")
+    return not missing
+
+
+class ApiPlan:
+    """
+    Estimated TMDB usage of a run, built without writing anything.
+
+    ``calls`` are the requests the run itself is expected to make (possibly
+    fractional, since some depend on sampled averages); ``planning_calls``
+    are the read-only requests the planner made to find out.
+    """
+
+    def __init__(self, name: str, rate: float = None):
+        self.name = name
+        self.rate = rate or float(os.getenv('CRAWL_RATE_LIMIT', DEFAULT_RATE))
+        self.calls = Counter()
+        self.planning_calls = Counter()
+        self.cache_hits = Counter()
+        self.sleep_seconds = 0.0
+        self.actors = {}
+        self.notes = []
+        self._latencies = []
+
+    def fetch(self, movie_service: MovieDataService, endpoint: str, url: str, params: dict = None) -> dict:
+        """Make a planning request, timing it to project the run's latency"""
+        start = time.perf_counter()
+        response = movie_service.make_request("GET", url, params=params)
+        self._latencies.append(time.perf_counter() - start)
+        self.planning_calls[endpoint] += 1
+        return response
+
+    def add(self, endpoint: str, count: float) -> None:
+        if count:
+            self.calls[endpoint] += count
+
+    def hit(self, kind: str, count: float) -> None:
+        if count:
+            self.cache_hits[kind] += count
+
+    def report(self) -> Dict:
+        """Request counts per endpoint, cache hits and projected runtime"""
+        calls = {endpoint: math.ceil(count) for endpoint, count in sorted(self.calls.items())}
+        total = sum(calls.values())
+        latency = statistics.median(self._latencies) if self._latencies else None
+        # Runs are sequential, so each call costs the slower of its latency and the rate limit
+        per_call = max(1 / self.rate, latency or 0)
+        return {
+            'run': self.name,
+            'calls': calls,
+            'total_calls': total,
+            'planning_calls': dict(self.planning_calls),
+            'cache_hits': {kind: math.floor(count) for kind, count in sorted(self.cache_hits.items())},
+            'actors': {key: round(value, 1) if isinstance(value, float) else value
+                       for key, value in self.actors.items()},
+            'rate_limit': self.rate,
+            'median_latency_seconds': round(latency, 3) if latency is not None else None,
+            'sleep_seconds': round(self.sleep_seconds, 1),
+            'projected_seconds': round(total * per_call + self.sleep_seconds, 1),
+            'notes': self.notes,
+        }
+
+
+def sample_credits(plan: ApiPlan, session: Optional[Session], movie_service: MovieDataService,
+                   people: List[Dict], limit: int = DEFAULT_SAMPLE_SIZE) -> Dict:
+    """
+    Fetch credits for a few actors to calibrate per-actor estimates.
+
+    Pass ``session=None`` when stored languages cannot be read.
+
+    Returns:
+        Dict: ``eligible_share`` (share with enough credits),
+        ``qualified_share`` (share also passing the English ratio on known
+        languages), ``language_fetches`` (average unseen movies in the
+        language sample), ``language_hits`` (average sample movies with a
+        known language) and ``billed_credits`` (average detail fetches for a
+        roster)
+    """
+    sampled = people[:limit]
+    if not sampled:
+        return {'sampled': 0, 'eligible_share': 0.0, 'qualified_share': 0.0,
+                'language_fetches': 0.0, 'language_hits': 0.0, 'billed_credits': 0.0}
+
+    eligible = qualified = language_fetches = language_hits = billed = 0
+    for person in sampled:
+        credits = plan.fetch(movie_service, CREDITS,
+                             f"{movie_service.base_url}/person/{person['id']}/movie_credits").get("cast", [])
+        billed += sum(1 for credit in credits if credit.get("order", 999) <= BILLED_ORDER)
+        sample = credits[:LANGUAGE_SAMPLE_SIZE]
+        stored = known_languages(session, [credit['id'] for credit in sample]) if session else {}
+        languages = [stored.get(credit['id']) or credit.get('original_language') for credit in sample]
+        known = [language for language in languages if language]
+        language_fetches += len(sample) - len(known)
+        language_hits += len(known)
+        if len(credits) >= MIN_MOVIE_CREDITS:
+            eligible += 1
+            if known and sum(language == 'en' for language in known) / len(known) >= MIN_ENGLISH_RATIO:
+                qualified += 1
+
+    count = len(sampled)
+    plan.notes.append(f"Per-actor estimates are averages over {count} sampled actors")
+    return {
+        'sampled': count,
+        'eligible_share': eligible / count,
+        'qualified_share': qualified / count,
+        'language_fetches': language_fetches / count,
+        'language_hits': language_hits / count,
+        'billed_credits': billed / count,
+    }
+
+
+def add_roster_fetches(plan: ApiPlan, actors: float, sample: Dict) -> None:
+    """Calls made by get_actor_movies_with_details for each actor"""
+    plan.add(SEARCH, actors)
+    plan.add(CREDITS, actors)
+    plan.add(DETAILS, actors * sample['billed_credits'])
+
+
+def format_plan(report: Dict) -> str:
+    """Human-readable summary of ``ApiPlan.report``"""
+    lines = [f"Plan for {report['run']}: ~{report['total_calls']} TMDB calls, "
+             f"~{report['projected_seconds'] / 60:.1f} min at {report['rate_limit']:g} req/s"]
+    lines += [f"  {endpoint}: {count}" for endpoint, count in report['calls'].items()]
+    lines.append("Cache hits (answered without a request):")
+    lines += [f"  {kind}: {count}" for kind, count in report['cache_hits'].items()] or ["  none"]
+    lines.append("Actors: " + ', '.join(f"{key} {value}" for key, value in report['actors'].items()))
+    lines.append(f"Planner made {sum(report['planning_calls'].values())} read-only calls; "
+                 f"median latency {report['median_latency_seconds']}s; "
+                 f"{report['sleep_seconds']}s of built-in sleeps")
+    lines += [f"Note: {note}" for note in report['notes']]
+    return '\n'.join(lines)
@@ -1,10 +1,16 @@
-from flask import Flask, render_template, jsonify, request, session
+from flask import Flask, render_template, jsonify, request, session, send_file, make_response
 from movie_data import MovieDataService, TMDBError
-from db_service import DatabaseService
+from image_proxy import ImageProxy, ImageProxyError, UnsafeImageError, VARIANTS
+from events import EventLog
+from assets import AssetManifest
+from game_rules import GAME_STATE_KEYS, GuessError, check_guess, apply_guess, new_game_state, parse_movie_id
 import os
 from dotenv import load_dotenv
 import random
 import logging
+import uuid
+import threading
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -16,35 +22,156 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-key-change-this')
 
-# Initialize services
-movie_service = MovieDataService()
-db_service = DatabaseService()
+# Services are constructed on first use so workers boot without touching the
+# database, TMDB or background threads, and DB-only routes work without a token.
+# SQLAlchemy-backed modules are imported inside their getters for the same reason.
+_services = {}
+_services_lock = threading.Lock()
+
+def _service(name, factory):
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = factory()
+                logger.info(f"Initialized {name} service")
+    return service
+
+def get_movie_service() -> MovieDataService:
+    """Raises TMDBError if the client cannot be built, e.g. no TMDB token is set"""
+    try:
+        return _service('movie', MovieDataService)
+    except ValueError as e:
+        # Callers already degrade on TMDBError, so a missing token takes the same path
+        raise TMDBError(str(e))
+
+def get_db_service() -> 'DatabaseService':
+    from db_service import DatabaseService
+    return _service('db', DatabaseService)
+
+def get_image_proxy() -> ImageProxy:
+    return _service('image_proxy', lambda: ImageProxy(
+        os.getenv('IMAGE_CACHE_DIR', 'image_cache'),
+        int(os.getenv('IMAGE_CACHE_MAX_MB', '200')) * 1024 * 1024,
+        app.secret_key
+    ))
+
+def get_leaderboard() -> 'Leaderboard':
+    from leaderboard import Leaderboard
+    from sqlalchemy import create_engine
+    # Results need a writable database even when the catalog is served read-only
+    results_database_url = os.getenv('RESULTS_DATABASE_URL', os.getenv('DATABASE_URL'))
+    return _service('leaderboard', lambda: Leaderboard(
+        create_engine(results_database_url) if results_database_url else None
+    ))
+
+def get_event_log() -> EventLog:
+    return _service('event_log', lambda: EventLog(os.getenv('EVENT_LOG_DIR', 'events')))
+
+def get_assets() -> AssetManifest:
+    return _service('assets', AssetManifest)
+
+@app.context_processor
+def asset_helpers():
+    return {'asset_url': lambda name: get_assets().url(name)}
+
+def cacheable_json(payload, max_age: int = 0):
+    """
+    JSON response with an ETag, answered with 304 when the client already has it.
+
+    With ``max_age=0`` clients revalidate on every use, so unchanged results
+    cost a request but no body.
+    """
+    response = jsonify(payload)
+    response.add_etag()
+    response.cache_control.public = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+COSTAR_GRAPH_TTL = 3600  # Seconds before a graph built from a live database is rebuilt
+COSTAR_GRAPH_RETRY = 60  # Seconds to keep serving the previous graph after a failed rebuild
+_costar_graph = {'key': None, 'graph': None, 'retry_at': 0.0}
+_costar_graph_lock = threading.Lock()
+
+def get_costar_graph() -> 'CostarGraph':
+    """
+    Get the co-star graph from a snapshot (COSTAR_SNAPSHOT) or the catalog.
+
+    The graph is rebuilt when the snapshot file or catalog version changes, or
+    after ``COSTAR_GRAPH_TTL`` when it is built from a live database. If a
+    build fails the next attempt waits ``COSTAR_GRAPH_RETRY``, and the previous
+    graph, if any, keeps being served meanwhile.
+
+    Raises:
+        Exception: If no graph has been built yet and building one failed
+    """
+    from costar_graph import CostarGraph
+    snapshot_path = os.getenv('COSTAR_SNAPSHOT')
+    with _costar_graph_lock:
+        if _costar_graph['graph'] is None and time.monotonic() < _costar_graph['retry_at']:
+            raise RuntimeError("Co-star graph build failed recently")
+        try:
+            if snapshot_path:
+                key = ('snapshot', os.path.getmtime(snapshot_path))
+            else:
+                version = get_db_service().current_catalog_version()
+                key = ('catalog', version) if version else ('database', int(time.time() // COSTAR_GRAPH_TTL))
+            if _costar_graph['key'] != key and time.monotonic() >= _costar_graph['retry_at']:
+                graph = CostarGraph.from_snapshot(snapshot_path) if snapshot_path \
+                    else CostarGraph.from_engine(get_db_service().engine)
+                _costar_graph.update(key=key, graph=graph)
+                logger.info(f"Built co-star graph for {key}")
+        except Exception as e:
+            _costar_graph['retry_at'] = time.monotonic() + COSTAR_GRAPH_RETRY
+            if _costar_graph['graph'] is None:
+                raise
+            logger.error(f"Error rebuilding co-star graph, serving the previous one: {e}")
+        return _costar_graph['graph']
+
+IMAGE_MAX_AGE = 365 * 24 * 3600  # Cached variants never change for a given URL
+ASSET_MAX_AGE = 365 * 24 * 3600  # Fingerprinted names change with their content
+SEARCH_MAX_AGE = 300  # The catalog only changes with the weekly update
 
 @app.route('/start_game')
 def start_game():
     """Initialize a new game with a random actor"""
     try:
-        # Get random actor from database
-        actor = db_service.get_random_actor()
+        # Get random actor from database, optionally from a difficulty tier
+        difficulty = request.args.get('difficulty')
+        try:
+            actor = get_db_service().get_random_actor(difficulty)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         if not actor:
             logger.error("No actors found in database")
             return jsonify({'error': 'No actors found in database. Please ensure database is populated.'}), 500
         
         # Get actor's movies from database
-        movies = db_service.get_actor_movies(actor.name)
+        movies = get_db_service().get_actor_movies(actor.name)
         if not movies:
             logger.error(f"No movies found for actor: {actor.name}")
             return jsonify({'error': f'No movies found for actor: {actor.name}'}), 500
         
-        movie_ids = [str(movie['id']) for movie in movies]
+        for movie in movies:
+            movie['poster_url'] = get_image_proxy().poster_url(movie.get('poster_path'))
+        
         # Set up session state
         session['actor_name'] = actor.name
-        session['correct_movie_ids'] = movie_ids
-        session['correct_movies'] = movies
-        session['guessed_movies'] = []
-        session['strikes'] = 0
-        session['game_over'] = False
-        actor.image_url = movie_service.get_actor_image_url(actor.name)
+        session['actor_id'] = actor.tmdb_id
+        session.update(new_game_state(movies))
+        session['game_id'] = uuid.uuid4().hex[:16]
+        get_event_log().emit('start', g=session['game_id'], a=actor.tmdb_id, n=actor.name,
+                             m=[movie['id'] for movie in movies])
+        try:
+            actor_image_url = get_movie_service().get_actor_image_url(actor.name)
+        except TMDBError as e:
+            logger.warning(f"Actor image unavailable, starting without it: {e}")
+            actor_image_url = None
+        actor.image_url = get_image_proxy().proxied_url(actor_image_url, 'card')
         session['actor_image_url'] =actor.image_url
         
         logger.info(f"Started new game with actor: {actor.name}")
@@ -53,13 +180,73 @@ def start_game():
             'message': 'New game started!',
             'strikes': 0,
             'game_over': False,
-            'actor_image_url': actor.image_url
+            'actor_image_url': actor.image_url,
+            'difficulty': difficulty
         })
     
     except Exception as e:
         logger.error(f"Error starting game: {e}")
         return jsonify({'error': str(e)}), 500
 
+def record_finished_game(movies_found: int) -> dict:
+    """Record the session's finished game on the leaderboard and return its ranks"""
+    get_event_log().emit('end', g=session.get('game_id'), a=session.get('actor_id'),
+                         won=movies_found == len(session['correct_movies']),
+                         f=movies_found, s=session['strikes'])
+    try:
+        return get_leaderboard().record(
+            actor_id=session.get('actor_id'),
+            actor_name=session['actor_name'],
+            movies_found=movies_found,
+            total_movies=len(session['correct_movies']),
+            strikes=session['strikes'],
+            player_name=request.json.get('player_name')
+        )
+    except Exception as e:
+        logger.error(f"Error recording game result: {e}")
+        return {}
+
+def get_movie_details(movie_id: str) -> dict:
+    """Details of a guessed movie from the catalog, falling back to TMDB"""
+    # Try to get movie from database first
+    movie = get_db_service().get_movie_by_id(int(movie_id))
+    if movie:
+        return {
+            'id': movie.tmdb_id,
+            'title': movie.title,
+            'release_date': f"{movie.release_year}-01-01",
+            'revenue': movie.revenue,
+            'poster_path': movie.poster_path,
+            'poster_url': get_image_proxy().poster_url(movie.poster_path)
+        }
+    try:
+        # Fall back to API if not in database
+        details = get_movie_service().get_movie_details(movie_id)
+        details['poster_url'] = get_image_proxy().poster_url(details.get('poster_path'))
+        return details
+    except TMDBError as e:
+        # Rosters only hold catalog movies, so the guess is wrong either way
+        logger.warning(f"Movie details unavailable, scoring without them: {e}")
+        return {
+            'id': int(movie_id),
+            'title': None,
+            'release_date': None,
+            'revenue': 0,
+            'poster_path': None
+        }
+
+def play_guess(state: dict, movie_id: str) -> dict:
+    """Score one guess against the game state, logging it and recording a finished game"""
+    check_guess(state, movie_id)
+    movie_details = get_movie_details(movie_id)
+    result = apply_guess(state, movie_id, movie_details)
+    get_event_log().emit('guess', g=session.get('game_id'), a=session.get('actor_id'),
+                         m=int(movie_id), c=result['correct'], title=movie_details.get('title'))
+    if result['game_over']:
+        session.update(state)
+        result['leaderboard_rank'] = record_finished_game(len(state['guessed_movies']))
+    return result
+
 @app.route('/submit_guess', methods=['POST'])
 def submit_guess():
     """Handle movie guess submission"""
@@ -74,100 +261,186 @@ def submit_guess():
         if not movie_id:
             return jsonify({'error': 'No movie_id provided'}), 400
         
-        # Convert to string for comparison
-        movie_id = str(movie_id)
-        correct_movies = session['correct_movies']
-        guessed_movies = session['guessed_movies']
-        
-        # Check if movie already guessed
-        if movie_id in [str(m['id']) for m in guessed_movies]:
-            return jsonify({'error': 'Movie already guessed'}), 400
-        
-        # Try to get movie from database first
-        movie = db_service.get_movie_by_id(int(movie_id))
-        if not movie:
-            try:
-                # Fall back to API if not in database
-                movie_details = movie_service.get_movie_details(movie_id)
-            except TMDBError as e:
-                return jsonify({'error': str(e)}), 500
-        else:
-            movie_details = {
-                'id': movie.tmdb_id,
-                'title': movie.title,
-                'release_date': f"{movie.release_year}-01-01",
-                'revenue': movie.revenue,
-                'poster_path': movie.poster_path
-            }
+        state = {key: session[key] for key in GAME_STATE_KEYS}
+        try:
+            result = play_guess(state, str(parse_movie_id(movie_id)))
+        except GuessError as e:
+            return jsonify({'error': str(e)}), 400
+        finally:
+            # Keep whatever was scored even if a later step failed
+            session.update(state)
+        return jsonify(result)
         
-        # Check if guess is correct
-        is_correct = movie_id in session['correct_movie_ids']
-        
-        if is_correct:
-            guessed_movies.append(movie_details)
-            session['guessed_movies'] = guessed_movies
-            
-            # Calculate highest revenue
-            highest_revenue = max([m['revenue'] for m in guessed_movies])
-            
-            # Sort correct movies by revenue to get true rankings
-            sorted_correct_movies = sorted(session['correct_movies'], 
-                                        key=lambda x: x['revenue'], 
-                                        reverse=True)
-            # Get the true rank of the guessed movie
-            true_rank = next(i + 1 for i, m in enumerate(sorted_correct_movies) 
-                           if str(m['id']) == str(movie_id))
-            
-            # Check if all movies found
-            if len(guessed_movies) == len(correct_movies):
-                session['game_over'] = True
-                return jsonify({
-                    'correct': True,
-                    'message': 'Congratulations! You found all movies!',
-                    'game_over': True,
-                    'guessed_movies': guessed_movies,
-                    'strikes': session['strikes'],
-                    'highest_revenue': highest_revenue,
-                    'true_rank': true_rank
-                })
-            
-            return jsonify({
-                'correct': True,
-                'message': 'Correct guess!',
-                'guessed_movies': guessed_movies,
-                'strikes': session['strikes'],
-                'game_over': False,
-                'highest_revenue': highest_revenue,
-                'true_rank': true_rank
-            })
+    except Exception as e:
+        logger.error(f"Error in submit_guess: {str(e)}")
+        return jsonify({'error': 'Server error processing guess'}), 500
+
+MAX_BULK_GUESSES = 50
+
+@app.route('/submit_guesses', methods=['POST'])
+def submit_guesses():
+    """
+    Play a sequence of guesses in one request, for bots and load tests.
+
+    Guesses are scored in order with the same rules as ``/submit_guess``.
+    Each entry in ``results`` carries the guessed ``movie_id`` (as an integer,
+    or as sent if it is not a valid ID) and either the guess outcome or an
+    ``error``; guesses after the game ends are rejected.
+    """
+    try:
+        if 'actor_name' not in session:
+            return jsonify({'error': 'No active game'}), 400
         
-        # Handle incorrect guess
-        session['strikes'] = session.get('strikes', 0) + 1
+        movie_ids = request.json.get('movie_ids')
+        if not isinstance(movie_ids, list) or not movie_ids:
+            return jsonify({'error': 'No movie_ids provided'}), 400
+        if len(movie_ids) > MAX_BULK_GUESSES:
+            return jsonify({'error': f'At most {MAX_BULK_GUESSES} guesses per request'}), 400
         
-        # Check if game is over due to strikes
-        if session['strikes'] >= 3:
-            session['game_over'] = True
-            return jsonify({
-                'correct': False,
-                'message': 'Game Over! Too many incorrect guesses.',
-                'game_over': True,
-                'correct_movies': sorted(correct_movies, key=lambda x: x['revenue'], reverse=True),  # Sort by revenue
-                'strikes': session['strikes'],
-                'highest_revenue': max([m['revenue'] for m in correct_movies])
-            })
+        state = {key: session[key] for key in GAME_STATE_KEYS}
+        results = []
+        try:
+            for value in movie_ids:
+                try:
+                    movie_id = parse_movie_id(value)
+                except GuessError as e:
+                    results.append({'movie_id': value, 'error': str(e)})
+                    continue
+                try:
+                    result = play_guess(state, str(movie_id))
+                except GuessError as e:
+                    results.append({'movie_id': movie_id, 'error': str(e)})
+                    continue
+                # The running roster is returned once below instead of with every guess
+                result.pop('guessed_movies', None)
+                results.append({'movie_id': movie_id, **result})
+        finally:
+            # Guesses already scored (and logged) stay played even if a later one fails
+            session.update(state)
         
-        # Return response for incorrect guess
         return jsonify({
-            'correct': False,
-            'message': 'Incorrect guess!',
-            'guessed_movies': guessed_movies,
-            'strikes': session['strikes'],
-            'game_over': False
+            'results': results,
+            'guessed_movies': state['guessed_movies'],
+            'strikes': state['strikes'],
+            'game_over': state['game_over']
         })
         
     except Exception as e:
-        logger.error(f"Error in submit_guess: {str(e)}")
-        return jsonify({'error': 'Server error processing guess'}), 500
+        logger.error(f"Error in submit_guesses: {str(e)}")
+        return jsonify({'error': 'Server error processing guesses'}), 500
+
+@app.route('/leaderboard')
+def show_leaderboard():
+    """Top results for the daily or all-time leaderboard"""
+    scope = request.args.get('scope', 'all_time')
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    try:
+        results = get_leaderboard().top(scope, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return cacheable_json({'scope': scope, 'results': results})
+
+@app.route('/connect/start')
+def start_connection_game():
+    """Start a game linking two actors through shared movies"""
+    hops = min(max(request.args.get('hops', 2, type=int), 1), 6)
+    try:
+        graph = get_costar_graph()
+    except Exception as e:
+        logger.error(f"Error building co-star graph: {e}")
+        return jsonify({'error': 'Connection game unavailable, please try again shortly'}), 503
+    puzzle = graph.random_puzzle(hops)
+    if not puzzle:
+        return jsonify({'error': f'No actor pair found {hops} movies apart'}), 500
+    
+    source, target = puzzle
+    session['connect'] = {
+        'source': graph.tmdb_id(source),
+        'target': graph.tmdb_id(target),
+        'hops': hops
+    }
+    return jsonify({
+        'source': graph.describe(source),
+        'target': graph.describe(target),
+        'hops': hops
+    })
+
+@app.route('/connect/check', methods=['POST'])
+def check_connection():
+    """
+    Validate a chain of alternating actor and movie IDs, e.g.
+    ``{"path": [actor_id, movie_id, actor_id, ...]}``. Send ``give_up: true``
+    to get a shortest solution instead.
+    """
+    game = session.get('connect')
+    if not game:
+        return jsonify({'error': 'No active connection game'}), 400
+    
+    try:
+        graph = get_costar_graph()
+    except Exception as e:
+        logger.error(f"Error building co-star graph: {e}")
+        return jsonify({'error': 'Connection game unavailable, please try again shortly'}), 503
+    source = graph.actor_node(game['source'])
+    target = graph.actor_node(game['target'])
+    if source is None or target is None:
+        return jsonify({'error': 'Catalog changed, please start a new game'}), 400
+    
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    
+    if body.get('give_up'):
+        solution = graph.shortest_path(source, target)
+        session.pop('connect', None)
+        return jsonify({
+            'valid': False,
+            'solution': [graph.describe(node) for node in solution] if solution else None
+        })
+    
+    path = body.get('path') or []
+    try:
+        if not isinstance(path, list):
+            raise TypeError
+        path = [int(tmdb_id) for tmdb_id in path]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'path must be a list of TMDB IDs'}), 400
+    
+    nodes = []
+    for i, tmdb_id in enumerate(path):
+        node = graph.actor_node(tmdb_id) if i % 2 == 0 else graph.movie_node(tmdb_id)
+        if node is None:
+            return jsonify({'valid': False, 'message': f'Unknown {"actor" if i % 2 == 0 else "movie"}: {tmdb_id}'})
+        nodes.append(node)
+    
+    if not graph.validate_path(nodes, source, target):
+        return jsonify({'valid': False, 'message': 'Those credits do not connect the two actors'})
+    
+    session.pop('connect', None)
+    movies_used = len(nodes) // 2
+    return jsonify({
+        'valid': True,
+        'message': 'Connected!',
+        'movies_used': movies_used,
+        'optimal_movies': game['hops']
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Background writer counters and upstream circuit breaker state"""
+    # Report only services that have been started rather than starting them here
+    event_log = _services.get('event_log')
+    leaderboard = _services.get('leaderboard')
+    movie_service = _services.get('movie')
+    image_proxy = _services.get('image_proxy')
+    upstreams = movie_service.breaker_states() if movie_service else {}
+    if image_proxy:
+        upstreams['images'] = image_proxy.breaker.state()
+    return jsonify({
+        'events': event_log.stats() if event_log else None,
+        'leaderboard_writer': leaderboard.writer.stats() if leaderboard and leaderboard.writer else None,
+        'upstreams': upstreams
+    })
 
 @app.route('/search_movies')
 def search_movies():
@@ -177,16 +450,80 @@ def search_movies():
     
     try:
         # Try database search first
-        movies = db_service.search_movies(query)
+        movies = get_db_service().search_movies(query)
         
-        # If no results, fallback to API
+        # If no exact matches, try typo-tolerant local matching
         if not movies:
-            movies = movie_service.search_movies(query)
+            movies = get_db_service().suggest_movies(query)
         
-        return jsonify(movies)
+        # Only fall back to the API when nothing in the catalog is close
+        if not movies:
+            try:
+                movies = get_movie_service().search_movies(query)
+            except TMDBError as e:
+                # Degrade to local-only results while TMDB is unavailable, and
+                # don't let caches hold on to them once it is back
+                logger.warning(f"TMDB search unavailable: {e}")
+                response = jsonify(movies)
+                response.cache_control.no_store = True
+                return response
+        
+        return cacheable_json(movies, SEARCH_MAX_AGE)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+def send_cached_image(url: str, variant: str):
+    """Serve an image variant from the disk cache with long-lived caching"""
+    if variant not in VARIANTS:
+        return jsonify({'error': f'Unknown image variant: {variant}'}), 404
+    image_proxy = get_image_proxy()
+    try:
+        image, key = image_proxy.open(url, variant)
+    except UnsafeImageError as e:
+        logger.warning(f"Image proxy rejected upstream image: {e}")
+        return jsonify({'error': 'Upstream image rejected'}), 502
+    except ImageProxyError as e:
+        logger.warning(f"Image proxy falling back to placeholder: {e}")
+        return app.send_static_file('placeholder.png')
+    
+    response = send_file(image, mimetype=image_proxy.mimetype(image), etag=key,
+                         max_age=IMAGE_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/image/<variant>')
+def proxied_image(variant):
+    """Serve a signed remote image (actor headshots) through the local cache"""
+    src = request.args.get('src', '')
+    if not get_image_proxy().verify(src, request.args.get('sig')):
+        return jsonify({'error': 'Invalid image signature'}), 403
+    return send_cached_image(src, variant)
+
+@app.route('/poster/<variant>/<path:poster_path>')
+def proxied_poster(variant, poster_path):
+    """Serve a signed TMDB poster through the local cache"""
+    src = ImageProxy.poster_source(poster_path)
+    if not get_image_proxy().verify(src, request.args.get('sig')):
+        return jsonify({'error': 'Invalid image signature'}), 403
+    return send_cached_image(src, variant)
+
+@app.route('/assets/<filename>')
+def asset(filename):
+    """Serve a fingerprinted asset, precompressed when the client accepts it"""
+    resolved = get_assets().resolve(filename, request.headers.get('Accept-Encoding', ''))
+    if not resolved:
+        return jsonify({'error': 'Asset not found'}), 404
+    path, mimetype, encoding = resolved
+    
+    response = send_file(path, mimetype=mimetype, max_age=ASSET_MAX_AGE, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 @app.route('/')
 def home():
     if 'actor_name' not in session:
@@ -195,14 +532,19 @@ def home():
     # Calculate highest revenue from correct movies
     highest_revenue = max([m['revenue'] for m in session['correct_movies']] if session.get('correct_movies') else [0])
     
-    return render_template('home.html', 
+    response = make_response(render_template('home.html', 
                          actor_name=session['actor_name'],
                          strikes=session['strikes'],
                          guessed_movies=session['guessed_movies'],
                          game_over=session['game_over'],
                          actor_image_url=session['actor_image_url'],
                          highest_revenue=highest_revenue
-                         )
+                         ))
+    # The page depends on the session, so only the browser may reuse it
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/new_game')
 def new_game():
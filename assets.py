@@ -0,0 +1,172 @@
+from typing import Dict, Optional
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(HERE, 'static')
+BUILD_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST = 'manifest.json'
+
+# Source files under static/ that pages reference through asset_url()
+ASSETS = ('style.css', 'script.js')
+MIMETYPES = {'.css': 'text/css', '.js': 'text/javascript'}
+
+# Precompressed variants, in order of preference, keyed by Content-Encoding
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _brotli_compress(data: bytes) -> Optional[bytes]:
+    try:
+        import brotli
+    except ImportError:  # brotli is optional; browsers fall back to gzip
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    """Write through a uniquely named temp file so concurrent builds never share one"""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix='.build-', delete=False) as f:
+        try:
+            f.write(content)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.chmod(f.name, 0o644)  # NamedTemporaryFile creates files readable only by the owner
+    os.replace(f.name, path)
+
+
+def build_assets(static_dir: str = STATIC_DIR, build_dir: str = BUILD_DIR) -> Dict[str, str]:
+    """
+    Fingerprint the assets and write gzip and brotli variants next to them.
+
+    Each asset is copied to ``name.<hash>.ext`` so its URL changes whenever
+    its content does, which lets browsers cache it forever.
+
+    Returns:
+        Dict[str, str]: Manifest mapping source names to fingerprinted names
+    """
+    os.makedirs(build_dir, exist_ok=True)
+    manifest = {}
+    for name in ASSETS:
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        variants = {'': data, '.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        compressed = _brotli_compress(data)
+        if compressed is not None:
+            variants['.br'] = compressed
+        for suffix, content in variants.items():
+            path = os.path.join(build_dir, built + suffix)
+            if not os.path.exists(path):
+                _write_atomic(path, content)
+        manifest[name] = built
+        logger.info(f"Built {built} ({len(data)} bytes, "
+                    + ', '.join(f"{suffix[1:]} {len(content)}" for suffix, content in variants.items() if suffix)
+                    + ")")
+
+    _write_atomic(os.path.join(build_dir, MANIFEST), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def encoding_qualities(accept_encoding: str) -> Dict[str, float]:
+    """Quality value of each content coding listed in an Accept-Encoding header"""
+    qualities = {}
+    for token in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in token.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    return qualities
+
+
+class AssetManifest:
+    """Maps asset names to fingerprinted files, rebuilding when a source changes"""
+
+    def __init__(self, static_dir: str = STATIC_DIR, build_dir: str = BUILD_DIR):
+        self.static_dir = static_dir
+        self.build_dir = build_dir
+        self._manifest = {}
+        self._sources_mtime = None
+        self._lock = threading.Lock()
+
+    def _current_mtime(self) -> float:
+        return max(os.path.getmtime(os.path.join(self.static_dir, name)) for name in ASSETS)
+
+    def manifest(self) -> Dict[str, str]:
+        mtime = self._current_mtime()
+        if mtime != self._sources_mtime:
+            with self._lock:
+                if mtime != self._sources_mtime:
+                    manifest = self._load()
+                    if manifest is None or self._stale(manifest, mtime):
+                        manifest = build_assets(self.static_dir, self.build_dir)
+                    self._manifest, self._sources_mtime = manifest, mtime
+        return self._manifest
+
+    def _load(self) -> Optional[Dict[str, str]]:
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _stale(self, manifest: Dict[str, str], sources_mtime: float) -> bool:
+        """True if a source is newer than the build or a built file is missing"""
+        if sources_mtime > os.path.getmtime(os.path.join(self.build_dir, MANIFEST)):
+            return True
+        return any(name not in manifest or not os.path.exists(os.path.join(self.build_dir, manifest[name]))
+                   for name in ASSETS)
+
+    def url(self, name: str) -> str:
+        """Fingerprinted URL of an asset"""
+        return f"/assets/{self.manifest()[name]}"
+
+    def resolve(self, filename: str, accept_encoding: str):
+        """
+        Pick the file to send for a fingerprinted name.
+
+        Returns:
+            tuple: (path, mimetype, content encoding or None), or None if no
+            such asset was built
+        """
+        # Earlier builds stay servable so pages rendered before a deploy still load
+        mimetype = MIMETYPES.get(os.path.splitext(filename)[1])
+        path = os.path.join(self.build_dir, filename)
+        if mimetype is None or os.path.basename(filename) != filename or not os.path.isfile(path):
+            return None
+        qualities = encoding_qualities(accept_encoding)
+        for encoding, suffix in ENCODINGS:
+            # q=0 refuses a coding; '*' covers codings the header doesn't name
+            if qualities.get(encoding, qualities.get('*', 0)) > 0 and os.path.exists(path + suffix):
+                return path + suffix, mimetype, encoding
+        return path, mimetype, None
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress frontend assets")
+    parser.add_argument('--static-dir', default=STATIC_DIR)
+    parser.add_argument('--build-dir', default=BUILD_DIR)
+    args = parser.parse_args()
+    print(json.dumps(build_assets(args.static_dir, args.build_dir), indent=2))
+
+
+if __name__ == "__main__":
+    main()
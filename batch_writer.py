@@ -0,0 +1,116 @@
+from typing import Any, Callable, Dict, List
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Wakes the writer thread immediately on close
+
+
+class BatchWriter:
+    """
+    Background writer that drains a bounded in-process queue in batches.
+
+    ``submit`` never blocks: when the queue is full the item is dropped and
+    counted, so request handlers are never slowed down by the sink.
+    """
+
+    def __init__(self, flush_fn: Callable[[List[Any]], None], name: str = 'batch-writer',
+                 max_batch: int = 200, flush_interval: float = 2.0, max_queue: int = 10000):
+        """
+        Args:
+            flush_fn: Called from the writer thread with each batch of items
+            name (str): Thread name, also used in log messages
+            max_batch (int): Largest batch passed to ``flush_fn``
+            flush_interval (float): Seconds to wait for a batch to fill up
+            max_queue (int): Queue capacity before new items are dropped
+        """
+        self.flush_fn = flush_fn
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._stats = {
+            'submitted': 0,
+            'dropped': 0,
+            'written': 0,
+            'failed': 0,
+            'batches': 0,
+            'last_flush_seconds': 0.0,
+        }
+        self._stats_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, item: Any) -> bool:
+        """Queue an item for writing, returning False if it was dropped"""
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('submitted')
+        return True
+
+    def stats(self) -> Dict:
+        """Backpressure and throughput counters"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self.queue.qsize()
+        stats['queue_capacity'] = self.queue.maxsize
+        return stats
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush everything still queued and stop the writer thread"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        try:
+            self.queue.put_nowait(_STOP)
+        except queue.Full:
+            pass  # The writer is busy draining and will notice the flag
+        self._thread.join(timeout)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _next_batch(self) -> List[Any]:
+        """Wait up to ``flush_interval`` to collect up to ``max_batch`` items"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and batch:
+                break
+            try:
+                item = self.queue.get(timeout=max(remaining, 0.05))
+                if item is _STOP:
+                    break
+                batch.append(item)
+            except queue.Empty:
+                if batch or self._stopping.is_set():
+                    break
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                self.flush_fn(batch)
+                self._count('written', len(batch))
+            except Exception as e:
+                self._count('failed', len(batch))
+                logger.error(f"{self.name}: error writing batch of {len(batch)}: {e}")
+            with self._stats_lock:
+                self._stats['batches'] += 1
+                self._stats['last_flush_seconds'] = time.perf_counter() - start
@@ -0,0 +1,56 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_import(module: str) -> float:
+    """Seconds for a new interpreter to import ``module`` and exit"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {module}'], cwd=HERE, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def slowest_imports(module: str, top: int):
+    """Modules with the largest cumulative import time, from ``-X importtime``"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=HERE,
+                            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    # Every new gunicorn worker pays for a fresh interpreter importing the app
+    parser = argparse.ArgumentParser(description="Benchmark app import (worker boot) time")
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10, help="Show the slowest imports")
+    args = parser.parse_args()
+
+    # Baseline interpreter start-up, so the app's own cost can be separated out
+    baseline = statistics.median(time_import('sys') for _ in range(args.runs))
+    samples = [time_import(args.module) for _ in range(args.runs)]
+    print(f"interpreter: {baseline * 1000:.1f} ms")
+    print(f"import {args.module}: median {statistics.median(samples) * 1000:.1f} ms, "
+          f"min {min(samples) * 1000:.1f} ms, max {max(samples) * 1000:.1f} ms over {args.runs} runs")
+    print(f"app cost: {(statistics.median(samples) - baseline) * 1000:.1f} ms")
+
+    if args.top:
+        print("\nslowest imports (cumulative ms):")
+        for cumulative_us, self_us, name in slowest_imports(args.module, args.top):
+            print(f"  {cumulative_us / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
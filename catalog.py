@@ -0,0 +1,167 @@
+from sqlalchemy import create_engine, event, select, text, Table, Column, String, MetaData
+from sqlalchemy.engine import Engine
+from models import Base, CATALOG_TABLES
+from datetime import datetime, UTC
+from typing import Optional
+import argparse
+import logging
+import os
+import time
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CURRENT_POINTER = 'CURRENT'
+KEEP_VERSIONS = 3
+COPY_BATCH_SIZE = 5000
+MMAP_SIZE = 256 * 1024 * 1024  # Let SQLite read the whole file through the page cache
+
+# Key/value table describing the catalog build, stored inside the file itself
+_meta = MetaData()
+catalog_meta = Table(
+    'catalog_meta',
+    _meta,
+    Column('key', String(64), primary_key=True),
+    Column('value', String(255)),
+)
+
+
+def _copy_table(source, target, table) -> int:
+    """Copy every row of a table between connections in batches"""
+    rows = 0
+    result = source.execution_options(stream_results=True).execute(select(table))
+    while True:
+        batch = result.fetchmany(COPY_BATCH_SIZE)
+        if not batch:
+            break
+        target.execute(table.insert(), [row._asdict() for row in batch])
+        rows += len(batch)
+    return rows
+
+
+def build_catalog(source_engine: Engine, catalog_dir: str) -> str:
+    """
+    Build an immutable, versioned SQLite copy of the catalog.
+
+    The file is written under a temporary name and then renamed, and the
+    ``CURRENT`` pointer is swapped last, so readers only ever see complete
+    catalogs.
+
+    Args:
+        source_engine: Engine for the primary (Postgres) database
+        catalog_dir (str): Directory holding catalog versions
+
+    Returns:
+        str: Path of the new catalog file
+    """
+    start = time.perf_counter()
+    os.makedirs(catalog_dir, exist_ok=True)
+    # Microseconds keep versions from builds in the same second apart
+    version = datetime.now(UTC).strftime('%Y%m%d%H%M%S%f')
+    path = os.path.join(catalog_dir, f'catalog-{version}.sqlite')
+    if os.path.exists(path):
+        raise FileExistsError(f"Catalog version {version} already exists")
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    target_engine = create_engine(f'sqlite:///{tmp_path}')
+    tables = [Base.metadata.tables[name] for name in CATALOG_TABLES]
+    Base.metadata.create_all(target_engine, tables=tables)
+    _meta.create_all(target_engine)
+
+    with source_engine.connect() as source, target_engine.begin() as target:
+        counts = {table.name: _copy_table(source, target, table) for table in tables}
+        target.execute(catalog_meta.insert(), [
+            {'key': 'version', 'value': version},
+            {'key': 'built_at', 'value': datetime.now(UTC).isoformat()},
+        ] + [{'key': f'rows.{name}', 'value': str(count)} for name, count in counts.items()])
+
+    with target_engine.connect() as target:
+        target.execute(text('ANALYZE'))
+        target.commit()
+        target.execute(text('VACUUM'))
+    target_engine.dispose()
+
+    # link() refuses to overwrite, so a version workers may have open is never replaced
+    try:
+        os.link(tmp_path, path)
+    finally:
+        os.remove(tmp_path)
+    pointer_tmp = os.path.join(catalog_dir, f'{CURRENT_POINTER}.{os.getpid()}.tmp')
+    with open(pointer_tmp, 'w') as f:
+        f.write(os.path.basename(path))
+    os.replace(pointer_tmp, os.path.join(catalog_dir, CURRENT_POINTER))
+
+    prune_catalogs(catalog_dir)
+    logger.info(f"Built catalog {path} ({counts}) in {time.perf_counter() - start:.2f}s")
+    return path
+
+
+def prune_catalogs(catalog_dir: str, keep: int = KEEP_VERSIONS) -> None:
+    """Delete all but the newest catalog versions"""
+    versions = sorted(name for name in os.listdir(catalog_dir)
+                      if name.startswith('catalog-') and name.endswith('.sqlite'))
+    for name in versions[:-keep]:
+        os.remove(os.path.join(catalog_dir, name))
+        logger.info(f"Removed old catalog {name}")
+
+
+def resolve_catalog_path(catalog_path: str) -> Optional[str]:
+    """Resolve a catalog file, following the CURRENT pointer for directories"""
+    if not os.path.isdir(catalog_path):
+        return catalog_path if os.path.exists(catalog_path) else None
+    pointer = os.path.join(catalog_path, CURRENT_POINTER)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        return os.path.join(catalog_path, f.read().strip())
+
+
+def catalog_engine(path: str) -> Engine:
+    """
+    Open a catalog file read-only.
+
+    ``immutable=1`` tells SQLite the file never changes, so it skips locking
+    and change detection, and memory-mapped reads let every worker on the host
+    share the same cached pages.
+    """
+    engine = create_engine(
+        f'sqlite:///file:{os.path.abspath(path)}?mode=ro&immutable=1&uri=true',
+        connect_args={'check_same_thread': False}
+    )
+
+    @event.listens_for(engine, 'connect')
+    def _configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        cursor.execute('PRAGMA query_only=1')
+        cursor.close()
+
+    return engine
+
+
+def catalog_version(engine: Engine) -> Optional[str]:
+    """Read the version stamp of an open catalog"""
+    with engine.connect() as conn:
+        return conn.execute(
+            select(catalog_meta.c.value).where(catalog_meta.c.key == 'version')
+        ).scalar()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Build a read-only catalog from the primary database")
+    parser.add_argument('catalog_dir', nargs='?', default=os.getenv('CATALOG_DIR', 'catalog'))
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in environment")
+    build_catalog(create_engine(database_url), args.catalog_dir)
+
+
+if __name__ == "__main__":
+    main()
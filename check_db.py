@@ -1,37 +1,173 @@
 from db_service import DatabaseService
-from models import Actor, Movie
+from models import Actor, Movie, actor_movies
+from sqlalchemy import select, func, case, exists, literal, distinct
+from sqlalchemy.engine import Engine
+from datetime import datetime, timedelta, UTC
+from typing import Dict
+import argparse
+import json
 import logging
+import time
+from dotenv import load_dotenv
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def check_database():
+MIN_PLAYABLE_MOVIES = 5  # A game deals five movies per actor
+SHORT_ROSTER_SAMPLE = 20
+STALENESS_BUCKETS = (7, 30, 90)  # Days since an actor was last refreshed
+
+class _Timer:
+    """Runs queries and records how long each one took"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.timings_ms = {}
+
+    def run(self, name: str, statement):
+        start = time.perf_counter()
+        rows = self.conn.execute(statement).all()
+        self.timings_ms[name] = round((time.perf_counter() - start) * 1000, 2)
+        return rows
+
+def catalog_report(engine: Engine, min_playable: int = MIN_PLAYABLE_MOVIES) -> Dict:
+    """
+    Catalog data-quality report built from a few aggregate queries.
+
+    Args:
+        engine: Catalog database
+        min_playable (int): Actors with fewer movies that have revenue are reported
+
+    Returns:
+        Dict: Totals, roster-size histogram, short rosters, revenue gaps,
+        orphaned movies, duplicate links, staleness and per-query timings
+    """
+    now = datetime.now(UTC)
+    with engine.connect() as conn:
+        timer = _Timer(conn)
+
+        totals = timer.run('totals', select(
+            select(func.count()).select_from(Actor).scalar_subquery(),
+            select(func.count()).select_from(Movie).scalar_subquery(),
+            select(func.count()).select_from(actor_movies).scalar_subquery(),
+        ))[0]
+
+        # One row per actor: distinct linked movies and how many of them have revenue
+        rosters = select(
+            Actor.tmdb_id.label('actor_id'),
+            Actor.name.label('name'),
+            func.count(distinct(actor_movies.c.movie_id)).label('size'),
+            func.count(distinct(case((Movie.revenue > 0, Movie.tmdb_id)))).label('playable'),
+        ).select_from(Actor) \
+            .outerjoin(actor_movies, actor_movies.c.actor_id == Actor.tmdb_id) \
+            .outerjoin(Movie, Movie.tmdb_id == actor_movies.c.movie_id) \
+            .group_by(Actor.tmdb_id, Actor.name) \
+            .subquery()
+
+        histogram = timer.run('roster_sizes', select(rosters.c.size, func.count())
+                              .group_by(rosters.c.size).order_by(rosters.c.size))
+
+        short_rosters = timer.run('short_rosters', select(
+            rosters.c.actor_id, rosters.c.name, rosters.c.playable, func.count().over()
+        ).where(rosters.c.playable < min_playable)
+            .order_by(rosters.c.playable, rosters.c.name)
+            .limit(SHORT_ROSTER_SAMPLE))
+
+        revenue = timer.run('revenue', select(
+            func.count(case((Movie.revenue.is_(None), literal(1)))),
+            func.count(case((Movie.revenue == 0, literal(1)))),
+        ))[0]
+
+        orphaned = timer.run('orphaned_movies', select(func.count()).select_from(Movie).where(
+            ~exists().where(actor_movies.c.movie_id == Movie.tmdb_id)
+        ))[0][0]
+
+        duplicates = select(func.count().label('links')) \
+            .select_from(actor_movies) \
+            .group_by(actor_movies.c.actor_id, actor_movies.c.movie_id) \
+            .having(func.count() > 1) \
+            .subquery()
+        duplicate_pairs, duplicate_extra = timer.run('duplicate_links', select(
+            func.count(), func.coalesce(func.sum(duplicates.c.links - 1), 0)
+        ))[0]
+
+        # Naive UTC bounds, matching how last_updated is stored
+        bounds = [(now - timedelta(days=days)).replace(tzinfo=None) for days in STALENESS_BUCKETS]
+        staleness_columns = [func.count(case((Actor.last_updated.is_(None), literal(1))))]
+        newer = None
+        for bound in bounds:
+            condition = Actor.last_updated >= bound if newer is None else \
+                (Actor.last_updated >= bound) & (Actor.last_updated < newer)
+            staleness_columns.append(func.count(case((condition, literal(1)))))
+            newer = bound
+        staleness_columns += [
+            func.count(case((Actor.last_updated < newer, literal(1)))),
+            func.min(Actor.last_updated),
+        ]
+        staleness = timer.run('staleness', select(*staleness_columns))[0]
+
+    labels = [f'<{STALENESS_BUCKETS[0]}d'] + \
+        [f'{low}-{high}d' for low, high in zip(STALENESS_BUCKETS, STALENESS_BUCKETS[1:])] + \
+        [f'>{STALENESS_BUCKETS[-1]}d']
+    oldest = staleness[-1]
+    return {
+        'generated_at': now.isoformat(),
+        'totals': dict(zip(('actors', 'movies', 'actor_movies'), totals)),
+        'roster_sizes': {str(size): count for size, count in histogram},
+        'short_rosters': {
+            'min_playable': min_playable,
+            'count': short_rosters[0][3] if short_rosters else 0,
+            'sample': [{'actor_id': actor_id, 'name': name, 'playable': playable}
+                       for actor_id, name, playable, _ in short_rosters],
+        },
+        'movies_without_revenue': {'null': revenue[0], 'zero': revenue[1]},
+        'orphaned_movies': orphaned,
+        'duplicate_links': {'pairs': duplicate_pairs, 'extra_rows': int(duplicate_extra)},
+        'staleness': {
+            'never': staleness[0],
+            **dict(zip(labels, staleness[1:-1])),
+            'oldest': str(oldest) if oldest else None,
+        },
+        'timings_ms': timer.timings_ms,
+    }
+
+def check_database(as_json: bool = False):
     db = DatabaseService()
     
     try:
-        with db.get_db() as session:
-            # Check total counts
-            actor_count = session.query(Actor).count()
-            movie_count = session.query(Movie).count()
-            
-            logger.info(f"Database contains {actor_count} actors and {movie_count} movies")
-            
-            # Check actors with movies
-            actors_with_movies = session.query(Actor).filter(Actor.movies.any()).count()
-            logger.info(f"Actors with at least one movie: {actors_with_movies}")
-            
-            # Show sample of actors and their movies
-            logger.info("\nSample of actors in database:")
-            actors = session.query(Actor).limit(5).all()
-            for actor in actors:
-                logger.info(f"Actor: {actor.name}")
-                logger.info(f"- Movies: {len(actor.movies)}")
-                for movie in actor.movies[:3]:  # Show first 3 movies
-                    logger.info(f"  - {movie.title} ({movie.release_year})")
-                logger.info("")
-                
+        report = catalog_report(db.engine)
     except Exception as e:
         logger.error(f"Error checking database: {e}")
+        return
+    
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    
+    totals = report['totals']
+    logger.info(f"Database contains {totals['actors']} actors, {totals['movies']} movies "
+                f"and {totals['actor_movies']} actor-movie links")
+    logger.info("Roster sizes (movies per actor): " +
+                ', '.join(f"{size}: {count}" for size, count in report['roster_sizes'].items()))
+    
+    short = report['short_rosters']
+    logger.info(f"Actors with fewer than {short['min_playable']} movies with revenue: {short['count']}")
+    for actor in short['sample']:
+        logger.info(f"  - {actor['name']} ({actor['playable']})")
+    
+    logger.info(f"Movies with null revenue: {report['movies_without_revenue']['null']}, "
+                f"zero revenue: {report['movies_without_revenue']['zero']}")
+    logger.info(f"Orphaned movies (no actors): {report['orphaned_movies']}")
+    logger.info(f"Duplicate actor-movie links: {report['duplicate_links']['pairs']} pairs, "
+                f"{report['duplicate_links']['extra_rows']} extra rows")
+    logger.info("Actors by last update: " +
+                ', '.join(f"{bucket}: {count}" for bucket, count in report['staleness'].items()))
+    logger.info("Query times (ms): " +
+                ', '.join(f"{name}: {ms}" for name, ms in report['timings_ms'].items()))
 
 if __name__ == "__main__":
-    check_database() 
\ No newline at end of file
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Catalog data-quality report")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON for monitoring")
+    args = parser.parse_args()
+    check_database(as_json=args.json)
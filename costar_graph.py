@@ -0,0 +1,191 @@
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from models import Actor, Movie, actor_movies
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+import csv
+import io
+import logging
+import random
+import tarfile
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CostarGraph:
+    """
+    Compact actor-movie bipartite graph for "connect two actors" puzzles.
+
+    Nodes ``0..num_actors-1`` are actors and the rest are movies. Adjacency is
+    stored CSR-style in two flat int arrays: ``offsets[n]:offsets[n+1]`` is
+    the sorted slice of ``neighbors`` for node ``n``.
+    """
+
+    def __init__(self, actors: Dict[int, str], movies: Dict[int, str], edges: Iterable[Tuple[int, int]]):
+        """
+        Args:
+            actors: Actor TMDB ID to name
+            movies: Movie TMDB ID to title
+            edges: (actor TMDB ID, movie TMDB ID) links; duplicates are ignored
+        """
+        self.actor_ids = array('i', sorted(actors))
+        self.movie_ids = array('i', sorted(movies))
+        self.num_actors = len(self.actor_ids)
+        self.num_nodes = self.num_actors + len(self.movie_ids)
+        self.names = [actors[i] for i in self.actor_ids] + [movies[i] for i in self.movie_ids]
+        self._node = {tmdb_id: n for n, tmdb_id in enumerate(self.actor_ids)}
+        self._movie_node = {tmdb_id: self.num_actors + n for n, tmdb_id in enumerate(self.movie_ids)}
+
+        pairs = {(self._node[a], self._movie_node[m]) for a, m in edges
+                 if a in self._node and m in self._movie_node}
+        degree = array('i', [0]) * (self.num_nodes + 1)
+        for a, m in pairs:
+            degree[a] += 1
+            degree[m] += 1
+
+        self.offsets = array('i', [0]) * (self.num_nodes + 1)
+        for n in range(self.num_nodes):
+            self.offsets[n + 1] = self.offsets[n] + degree[n]
+        self.neighbors = array('i', [0]) * self.offsets[self.num_nodes]
+        fill = array('i', self.offsets[:-1])
+        for a, m in pairs:
+            self.neighbors[fill[a]] = m
+            fill[a] += 1
+            self.neighbors[fill[m]] = a
+            fill[m] += 1
+        for n in range(self.num_nodes):
+            start, end = self.offsets[n], self.offsets[n + 1]
+            self.neighbors[start:end] = array('i', sorted(self.neighbors[start:end]))
+
+    @classmethod
+    def from_engine(cls, engine: Engine) -> 'CostarGraph':
+        """Build the graph from the catalog tables"""
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            actors = dict(conn.execute(select(Actor.tmdb_id, Actor.name)).all())
+            movies = dict(conn.execute(select(Movie.tmdb_id, Movie.title)).all())
+            edges = conn.execute(select(actor_movies.c.actor_id, actor_movies.c.movie_id)).all()
+        graph = cls(actors, movies, edges)
+        logger.info(f"Built co-star graph ({graph.num_actors} actors, {graph.num_nodes - graph.num_actors} movies, "
+                    f"{len(graph.neighbors) // 2} links) in {time.perf_counter() - start:.2f}s")
+        return graph
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> 'CostarGraph':
+        """Build the graph from a ``snapshot.py`` export without a database"""
+        def rows(tar, name):
+            return csv.DictReader(io.TextIOWrapper(tar.extractfile(f'{name}.csv'), encoding='utf-8', newline=''))
+
+        with tarfile.open(path, 'r:gz') as tar:
+            actors = {int(row['tmdb_id']): row['name'] for row in rows(tar, 'actors')}
+            movies = {int(row['tmdb_id']): row['title'] for row in rows(tar, 'movies')}
+            edges = [(int(row['actor_id']), int(row['movie_id'])) for row in rows(tar, 'actor_movies')
+                     if row['actor_id'] and row['movie_id']]
+        return cls(actors, movies, edges)
+
+    def actor_node(self, actor_id: int) -> Optional[int]:
+        return self._node.get(actor_id)
+
+    def movie_node(self, movie_id: int) -> Optional[int]:
+        return self._movie_node.get(movie_id)
+
+    def tmdb_id(self, node: int) -> int:
+        return self.actor_ids[node] if node < self.num_actors else self.movie_ids[node - self.num_actors]
+
+    def describe(self, node: int) -> Dict:
+        """JSON-friendly description of a node"""
+        kind = 'actor' if node < self.num_actors else 'movie'
+        return {'type': kind, 'id': self.tmdb_id(node), 'name': self.names[node]}
+
+    def neighbors_of(self, node: int) -> array:
+        return self.neighbors[self.offsets[node]:self.offsets[node + 1]]
+
+    def has_edge(self, a: int, b: int) -> bool:
+        start, end = self.offsets[a], self.offsets[a + 1]
+        i = bisect_left(self.neighbors, b, start, end)
+        return i < end and self.neighbors[i] == b
+
+    def shortest_path(self, source: int, target: int, max_depth: int = 12) -> Optional[List[int]]:
+        """
+        Bidirectional BFS between two nodes.
+
+        Each round expands whichever frontier is smaller, so the search only
+        touches a small part of the graph around both endpoints.
+
+        Returns:
+            Optional[List[int]]: Nodes from source to target, or None if they
+            are not connected within ``max_depth`` edges
+        """
+        if source == target:
+            return [source]
+        parents = ({source: -1}, {target: -1})
+        frontiers = ([source], [target])
+        depth = 0
+        while frontiers[0] and frontiers[1] and depth < max_depth:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, other = parents[side], parents[1 - side]
+            next_frontier = []
+            for node in frontiers[side]:
+                for neighbor in self.neighbors_of(node):
+                    if neighbor in seen:
+                        continue
+                    seen[neighbor] = node
+                    if neighbor in other:
+                        return self._join(parents, neighbor)
+                    next_frontier.append(neighbor)
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+            depth += 1
+        return None
+
+    @staticmethod
+    def _join(parents, meeting: int) -> List[int]:
+        forward = []
+        node = meeting
+        while node != -1:
+            forward.append(node)
+            node = parents[0][node]
+        forward.reverse()
+        node = parents[1][meeting]
+        while node != -1:
+            forward.append(node)
+            node = parents[1][node]
+        return forward
+
+    def reachable(self, source: int, target: int) -> bool:
+        return self.shortest_path(source, target) is not None
+
+    def actors_at_distance(self, source: int, hops: int) -> List[int]:
+        """Actors exactly ``hops`` shared movies away from an actor"""
+        frontier, seen = [source], {source}
+        for _ in range(hops * 2):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self.neighbors_of(node):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return frontier
+
+    def random_puzzle(self, hops: int = 2, attempts: int = 20) -> Optional[Tuple[int, int]]:
+        """Pick two actor nodes whose shortest connection is exactly ``hops`` movies"""
+        if self.num_actors == 0:
+            return None
+        for _ in range(attempts):
+            source = random.randrange(self.num_actors)
+            candidates = self.actors_at_distance(source, hops)
+            if candidates:
+                return source, random.choice(candidates)
+        return None
+
+    def validate_path(self, nodes: List[int], source: int, target: int) -> bool:
+        """Check that a player's chain links source to target through real credits"""
+        if len(nodes) < 3 or nodes[0] != source or nodes[-1] != target:
+            return False
+        for i, node in enumerate(nodes):
+            # Chains must alternate actor, movie, actor, ...
+            if (node < self.num_actors) != (i % 2 == 0):
+                return False
+        return all(self.has_edge(a, b) for a, b in zip(nodes, nodes[1:]))
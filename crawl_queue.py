@@ -0,0 +1,332 @@
+from sqlalchemy import create_engine, select, update, func, or_, and_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from models import Base, Actor, CrawlTask, RateBudget, upgrade_schema
+from movie_data import MovieDataService
+from datetime import datetime, timedelta, UTC
+from typing import Dict, Iterable, List, Optional
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 300  # A crashed worker's tasks become claimable again after this
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF = 30  # Seconds before the first retry, doubled on each attempt
+DEFAULT_RATE = 30.0  # TMDB requests per second across all crawler processes
+TOKEN_CHUNK = 5  # Tokens taken from the shared budget per database round trip
+IDLE_POLL_SECONDS = 5
+TMDB_MAX_POPULAR_PAGES = 500  # /person/popular stops paging here
+
+
+class SharedRateLimiter:
+    """
+    Token bucket stored in the database so every crawler shares one budget.
+
+    Tokens are taken a few at a time with a compare-and-set update, so the
+    database sees one round trip per ``chunk`` requests rather than per request.
+    """
+
+    def __init__(self, engine: Engine, name: str = 'tmdb', rate: float = DEFAULT_RATE,
+                 burst: Optional[float] = None, chunk: int = TOKEN_CHUNK):
+        self.engine = engine
+        self.name = name
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.chunk = max(1, min(chunk, int(self.burst)))
+        self._available = 0
+        self._lock = threading.Lock()
+        try:
+            with engine.begin() as conn:
+                conn.execute(RateBudget.__table__.insert().values(
+                    name=name, tokens=self.burst, refilled_at=time.time(), version=0))
+        except IntegrityError:
+            pass  # Another crawler created the budget first
+
+    def acquire(self) -> None:
+        """Block until one request is allowed"""
+        with self._lock:
+            while not self._available:
+                taken, wait = self._take(self.chunk)
+                self._available += taken
+                if not taken:
+                    time.sleep(wait)
+            self._available -= 1
+
+    def _take(self, wanted: int):
+        """Take up to ``wanted`` tokens, returning (taken, seconds to wait if none)"""
+        with self.engine.begin() as conn:
+            tokens, refilled_at, version = conn.execute(
+                select(RateBudget.tokens, RateBudget.refilled_at, RateBudget.version)
+                .where(RateBudget.name == self.name)
+            ).one()
+            now = time.time()
+            tokens = min(self.burst, tokens + max(0.0, now - refilled_at) * self.rate)
+            taken = int(min(wanted, tokens))
+            result = conn.execute(
+                update(RateBudget)
+                .where(RateBudget.name == self.name, RateBudget.version == version)
+                .values(tokens=tokens - taken, refilled_at=now, version=version + 1)
+            )
+        if result.rowcount != 1:
+            return 0, 0.01  # Lost the race to another crawler; retry shortly
+        if taken:
+            return taken, 0.0
+        return 0, (1 - tokens) / self.rate
+
+
+class CrawlQueue:
+    """Crawl tasks with lease/ack semantics, shared through the database"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        Base.metadata.create_all(engine, tables=[CrawlTask.__table__, RateBudget.__table__])
+
+    def enqueue(self, kind: str, items: Iterable, payloads: Optional[Dict] = None) -> int:
+        """
+        Add tasks, skipping ones that already exist.
+
+        Args:
+            kind (str): Task kind, ``popular_page`` or ``actor``
+            items: Task keys (page numbers or actor IDs)
+            payloads (Dict, optional): JSON-serializable payload per key
+
+        Returns:
+            int: Number of new tasks
+        """
+        keys = list(dict.fromkeys(items))
+        if not keys:
+            return 0
+        payloads = payloads or {}
+        with self.engine.connect() as conn:
+            existing = set(conn.execute(
+                select(CrawlTask.key).where(CrawlTask.kind == kind, CrawlTask.key.in_(keys))
+            ).scalars())
+        new = [key for key in keys if key not in existing]
+        added = 0
+        for key in new:
+            # One insert per task so a concurrent enqueue of the same key only skips that key
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(CrawlTask.__table__.insert().values(
+                        kind=kind, key=key, status='pending', attempts=0,
+                        payload=json.dumps(payloads[key]) if key in payloads else None,
+                        available_at=datetime.now(UTC)))
+                added += 1
+            except IntegrityError:
+                pass
+        return added
+
+    def _claimable(self, now: datetime):
+        return or_(
+            and_(CrawlTask.status == 'pending', CrawlTask.available_at <= now),
+            and_(CrawlTask.status == 'leased', CrawlTask.lease_expires_at < now),
+        )
+
+    def lease(self, owner: str, limit: int = 1, lease_seconds: int = LEASE_SECONDS) -> List[Dict]:
+        """
+        Claim up to ``limit`` tasks for ``owner``.
+
+        On Postgres the candidate rows are locked with ``SKIP LOCKED`` so
+        concurrent workers pick disjoint tasks; the conditional update keeps
+        the claim safe on databases without row locks.
+        """
+        now = datetime.now(UTC)
+        expires = now + timedelta(seconds=lease_seconds)
+        with self.engine.begin() as conn:
+            ids = conn.execute(
+                select(CrawlTask.id)
+                .where(self._claimable(now))
+                .order_by(CrawlTask.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not ids:
+                return []
+            conn.execute(
+                update(CrawlTask)
+                .where(CrawlTask.id.in_(ids), self._claimable(now))
+                .values(status='leased', lease_owner=owner, lease_expires_at=expires,
+                        attempts=CrawlTask.attempts + 1)
+            )
+            rows = conn.execute(
+                select(CrawlTask.id, CrawlTask.kind, CrawlTask.key, CrawlTask.payload, CrawlTask.attempts)
+                .where(CrawlTask.id.in_(ids), CrawlTask.lease_owner == owner,
+                       CrawlTask.lease_expires_at == expires)
+            ).all()
+        return [row._asdict() for row in rows]
+
+    def _finish(self, task_id: int, owner: str, **values) -> bool:
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(CrawlTask)
+                .where(CrawlTask.id == task_id, CrawlTask.status == 'leased', CrawlTask.lease_owner == owner)
+                .values(lease_owner=None, lease_expires_at=None, **values)
+            )
+        if result.rowcount != 1:
+            logger.warning(f"Lease on task {task_id} was lost before it finished")
+            return False
+        return True
+
+    def ack(self, task_id: int, owner: str) -> bool:
+        """Mark a leased task done; False if the lease expired and was taken over"""
+        return self._finish(task_id, owner, status='done', last_error=None)
+
+    def fail(self, task: Dict, owner: str, error: str) -> bool:
+        """Release a leased task for a later retry, or give up after MAX_ATTEMPTS"""
+        if task['attempts'] >= MAX_ATTEMPTS:
+            return self._finish(task['id'], owner, status='failed', last_error=error)
+        retry_at = datetime.now(UTC) + timedelta(seconds=RETRY_BACKOFF * 2 ** (task['attempts'] - 1))
+        return self._finish(task['id'], owner, status='pending', available_at=retry_at, last_error=error)
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Task counts by kind and status"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(CrawlTask.kind, CrawlTask.status, func.count())
+                .group_by(CrawlTask.kind, CrawlTask.status)
+            ).all()
+        counts: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def outstanding(self) -> int:
+        """Tasks that are pending or leased"""
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).select_from(CrawlTask)
+                .where(CrawlTask.status.in_(('pending', 'leased')))
+            ).scalar()
+
+
+class CrawlWorker:
+    """Leases crawl tasks and runs them until the queue is drained"""
+
+    def __init__(self, engine: Engine, queue: CrawlQueue, movie_service: MovieDataService,
+                 target_actors: int, owner: Optional[str] = None):
+        self.queue = queue
+        self.movie_service = movie_service
+        self.session = sessionmaker(bind=engine)()
+        self.target_actors = target_actors
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers = {
+            'popular_page': self.crawl_popular_page,
+            'actor': self.crawl_actor,
+        }
+
+    def crawl_popular_page(self, page: int, payload: Optional[Dict]) -> None:
+        """Enqueue an actor task for every actor on a popular-people page"""
+        response = self.movie_service.make_request(
+            "GET", f"{self.movie_service.base_url}/person/popular", params={"page": page})
+        people = {
+            person["id"]: {
+                "id": person["id"],
+                "name": person["name"],
+                "popularity": person.get("popularity"),
+                "known_for_department": person.get("known_for_department"),
+                "known_for": [
+                    {"original_language": movie.get("original_language"), "media_type": movie.get("media_type")}
+                    for movie in person.get("known_for", [])
+                ],
+            }
+            for person in response.get("results", [])
+            if person.get("known_for_department") == "Acting"
+        }
+        added = self.queue.enqueue('actor', people, people)
+        logger.info(f"Page {page}: queued {added} new actors")
+
+    def crawl_actor(self, actor_id: int, person: Dict) -> None:
+        """Qualify one actor and add them with their movies"""
+        # Imported here so db_init's engine is only created for worker runs
+        from db_init import qualify_actor, populate_actor_movies
+
+        if self.session.get(Actor, actor_id):
+            return  # Known actors are refreshed by the updater
+        if self.session.query(Actor).count() >= self.target_actors:
+            logger.info(f"Catalog has {self.target_actors} actors, skipping {person['name']}")
+            return
+        # The shared rate budget paces requests, so no extra per-lookup delay
+        if qualify_actor(self.session, self.movie_service, person, delay=0):
+            if not populate_actor_movies(self.session, self.movie_service, person):
+                raise RuntimeError(f"Could not add actor {person['name']}")
+        else:
+            self.session.commit()  # Keep the movie languages fetched while qualifying
+
+    def run(self, exit_when_idle: bool = True) -> Dict[str, int]:
+        """Process tasks until none are left (or forever), returning per-outcome counts"""
+        processed = {'done': 0, 'failed': 0}
+        logger.info(f"Crawl worker {self.owner} started")
+        try:
+            while True:
+                tasks = self.queue.lease(self.owner)
+                if not tasks:
+                    if exit_when_idle and not self.queue.outstanding():
+                        break
+                    time.sleep(IDLE_POLL_SECONDS)
+                    continue
+                for task in tasks:
+                    payload = json.loads(task['payload']) if task['payload'] else None
+                    try:
+                        self.handlers[task['kind']](task['key'], payload)
+                        self.queue.ack(task['id'], self.owner)
+                        processed['done'] += 1
+                    except Exception as e:
+                        self.session.rollback()
+                        logger.error(f"Task {task['kind']}:{task['key']} failed (attempt {task['attempts']}): {e}")
+                        self.queue.fail(task, self.owner, str(e))
+                        processed['failed'] += 1
+        finally:
+            self.session.close()
+        logger.info(f"Crawl worker {self.owner} finished: {processed}")
+        return processed
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Distributed TMDB crawl for growing the actor catalog")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    seed_parser = subparsers.add_parser('seed', help="Queue popular-people pages")
+    seed_parser.add_argument('--pages', type=int, default=TMDB_MAX_POPULAR_PAGES)
+    work_parser = subparsers.add_parser('work', help="Run a crawler; start as many as the rate budget allows")
+    work_parser.add_argument('--target-actors', type=int, default=int(os.getenv('CRAWL_TARGET_ACTORS', '5000')))
+    work_parser.add_argument('--rate', type=float, default=float(os.getenv('CRAWL_RATE_LIMIT', DEFAULT_RATE)),
+                             help="TMDB requests per second shared by all crawlers")
+    work_parser.add_argument('--forever', action='store_true', help="Keep polling when the queue is empty")
+    subparsers.add_parser('status', help="Show task counts")
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in environment")
+    engine = create_engine(database_url)
+    queue = CrawlQueue(engine)
+
+    if args.command == 'seed':
+        pages = min(args.pages, TMDB_MAX_POPULAR_PAGES)
+        logger.info(f"Queued {queue.enqueue('popular_page', range(1, pages + 1))} new pages")
+    elif args.command == 'work':
+        Base.metadata.create_all(engine)
+        upgrade_schema(engine)
+        movie_service = MovieDataService()
+        movie_service.rate_limiter = SharedRateLimiter(engine, rate=args.rate)
+        CrawlWorker(engine, queue, movie_service, args.target_actors).run(exit_when_idle=not args.forever)
+    else:
+        print(json.dumps(queue.counts(), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
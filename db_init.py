@@ -1,11 +1,16 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
-from models import Base, Actor, Movie
+from models import Base, Actor, Movie, missing_schema, upgrade_schema
+from actor_stats import MIN_MOVIE_CREDITS, compute_english_ratio, stored_actor, is_qualified
 from movie_data import MovieDataService
+from api_plan import (ApiPlan, POPULAR, CREDITS, LANGUAGE, DEFAULT_SAMPLE_SIZE, has_english_majority,
+                      sample_credits, add_roster_fetches, format_plan, stored_data_usable)
 import os
 from dotenv import load_dotenv
 from typing import List, Dict
+import argparse
+import json
 import time
 from datetime import datetime
 import logging
@@ -30,9 +35,74 @@ SessionLocal = sessionmaker(bind=engine)
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(engine)
+    upgrade_schema(engine)
 
-def get_top_actors() -> List[Dict]:
-    """Get list of top 100 actors from TMDB"""
+def qualify_actor(session, movie_service: MovieDataService, person: Dict, delay: float = 0.25) -> bool:
+    """
+    Decide whether a person from the popular list belongs in the game.
+
+    Stores ``movie_credit_count`` and ``english_ratio`` on ``person`` so they
+    can be saved with the actor.
+
+    Args:
+        session: Database session, used to reuse stored stats and languages
+        movie_service: TMDB client
+        person (Dict): Entry from ``/person/popular``
+        delay (float): Pause between language lookups
+
+    Returns:
+        bool: True if the actor qualifies
+    """
+    if person.get("known_for_department") != "Acting":
+        return False
+    
+    logging.info(f"Checking actor: {person.get('name', 'Unknown')}")
+    
+    # Reuse stored qualification stats for actors we already know
+    known_actor = stored_actor(session, person["id"])
+    if known_actor:
+        person["movie_credit_count"] = known_actor.movie_credit_count
+        person["english_ratio"] = known_actor.english_ratio
+        if is_qualified(known_actor.movie_credit_count, known_actor.english_ratio):
+            logging.info(f"Added known actor: {person['name']} (stored stats)")
+            return True
+        return False
+    
+    # Get their movie credits first to check total count
+    movie_credits = movie_service.make_request(
+        "GET",
+        f"{movie_service.base_url}/person/{person['id']}/movie_credits"
+    )
+    
+    all_movies = movie_credits.get("cast", [])
+    person["movie_credit_count"] = len(all_movies)
+    # Skip if they don't have at least 15 movies
+    if len(all_movies) < MIN_MOVIE_CREDITS:
+        logging.info(f"Skipping {person['name']}: Only {len(all_movies)} movies")
+        return False
+    
+    # Only include actors with majority English language films
+    if not has_english_majority(person):
+        return False
+    
+    # Check language of their recent movies, fetching only unseen ones
+    logging.info(f"Checking recent movies for {person['name']}...")
+    english_ratio = compute_english_ratio(session, movie_service, all_movies, delay=delay)
+    person["english_ratio"] = english_ratio
+    
+    # Only include if 70% or more of their recent work is in English
+    if is_qualified(len(all_movies), english_ratio):
+        logging.info(f"Added actor: {person['name']} ({len(all_movies)} movies)")
+        return True
+    return False
+
+def get_top_actors(session) -> List[Dict]:
+    """
+    Get list of top 100 actors from TMDB.
+
+    This is the single-process crawl; use ``crawl_queue.py`` to build larger
+    catalogs with several workers.
+    """
     movie_service = MovieDataService()
     
     try:
@@ -49,51 +119,8 @@ def get_top_actors() -> List[Dict]:
             response = movie_service.make_request("GET", url, params=params)
             
             for person in response.get("results", []):
-                if person.get("known_for_department") != "Acting":
-                    continue
-                
-                logging.info(f"Checking actor: {person.get('name', 'Unknown')}")
-                
-                # Get their movie credits first to check total count
-                movie_credits = movie_service.make_request(
-                    "GET",
-                    f"{movie_service.base_url}/person/{person['id']}/movie_credits"
-                )
-                
-                all_movies = movie_credits.get("cast", [])
-                # Skip if they don't have at least 15 movies
-                if len(all_movies) < 15:
-                    logging.info(f"Skipping {person['name']}: Only {len(all_movies)} movies")
-                    continue
-                
-                # Check their known_for movies
-                known_for = person.get("known_for", [])
-                english_language_films = [
-                    movie for movie in known_for 
-                    if movie.get("original_language") == "en" and movie.get("media_type") == "movie"
-                ]
-                
-                # Only include actors with majority English language films
-                if len(english_language_films) >= len(known_for) * 0.5:
-                    # Check language of their recent movies
-                    english_movies = 0
-                    total_movies = 0
-                    logging.info(f"Checking recent movies for {person['name']}...")
-                    
-                    for movie in all_movies[:20]:
-                        movie_details = movie_service.make_request(
-                            "GET",
-                            f"{movie_service.base_url}/movie/{movie['id']}"
-                        )
-                        if movie_details.get("original_language") == "en":
-                            english_movies += 1
-                        total_movies += 1
-                        time.sleep(0.25)  # Add small delay between movie requests
-                    
-                    # Only include if 70% or more of their recent work is in English
-                    if total_movies > 0 and (english_movies / total_movies) >= 0.7:
-                        all_actors.append(person)
-                        logging.info(f"Added actor: {person['name']} ({len(all_movies)} movies)")
+                if qualify_actor(session, movie_service, person):
+                    all_actors.append(person)
             
             time.sleep(1)  # Increased delay between pages
             
@@ -109,14 +136,82 @@ def get_top_actors() -> List[Dict]:
         logging.error(f"Error fetching top actors: {e}")
         return []
 
-def populate_actor_movies(session, movie_service: MovieDataService, actor_data: Dict):
-    """Populate actor and their movies in database"""
+def plan_init(session, movie_service: MovieDataService, sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict:
+    """
+    Estimate the TMDB calls and runtime of ``main`` without writing anything.
+
+    Fetches the same popular pages ``get_top_actors`` reads, reuses stored
+    actor stats exactly as the crawl does, and samples credits of a few
+    unknown actors to estimate qualification and per-actor costs.
+
+    Returns:
+        Dict: ``ApiPlan.report`` for the run
+    """
+    plan = ApiPlan('db_init')
+    url = f"{movie_service.base_url}/person/popular"
+    pages = []
+    for page in range(1, 11):
+        response = plan.fetch(movie_service, POPULAR, url, params={"page": page})
+        pages.append([person for person in response.get("results", [])
+                      if person.get("known_for_department") == "Acting"])
+    
+    # Read stored stats only if the schema has them; the dry run never creates or upgrades it
+    usable = stored_data_usable(plan, missing_schema(session.get_bind()))
+    known = {person["id"]: stored_actor(session, person["id"]) if usable else None
+             for people in pages for person in people}
+    unknown = [person for people in pages for person in people if not known[person["id"]]]
+    sample = sample_credits(plan, session if usable else None, movie_service, unknown, sample_size)
+    
+    # Walk the pages as get_top_actors does, stopping once 100 actors are expected
+    qualified = qualified_known = 0.0
+    pages_read = 0
+    for people in pages:
+        pages_read += 1
+        plan.add(POPULAR, 1)
+        plan.sleep_seconds += 1
+        for person in people:
+            actor = known[person["id"]]
+            if actor:
+                plan.hit('stored_actor_stats', 1)
+                if is_qualified(actor.movie_credit_count, actor.english_ratio):
+                    qualified += 1
+                    qualified_known += 1
+                continue
+            plan.add(CREDITS, 1)
+            if has_english_majority(person):
+                checked = sample['eligible_share']
+                plan.add(LANGUAGE, checked * sample['language_fetches'])
+                plan.hit('known_movie_languages', checked * sample['language_hits'])
+                plan.sleep_seconds += checked * sample['language_fetches'] * 0.25
+                qualified += sample['qualified_share']
+        if qualified >= 100:
+            break
+    
+    # Actors with stored stats are already in the database and are skipped
+    selected = min(qualified, 100)
+    new_actors = max(selected - qualified_known, 0)
+    add_roster_fetches(plan, new_actors, sample)
+    plan.sleep_seconds += new_actors * 0.5
+    plan.actors = {
+        'pages': pages_read,
+        'candidates': sum(len(people) for people in pages[:pages_read]),
+        'known': int(qualified_known),
+        'selected_estimate': selected,
+        'new_estimate': new_actors,
+    }
+    return plan.report()
+
+def populate_actor_movies(session, movie_service: MovieDataService, actor_data: Dict) -> bool:
+    """Populate actor and their movies in database, returning False on failure"""
     try:
         # Create actor record
         actor = Actor(
             tmdb_id=actor_data["id"],
             name=actor_data["name"],
-            popularity=actor_data["popularity"]
+            popularity=actor_data["popularity"],
+            movie_credit_count=actor_data.get("movie_credit_count"),
+            english_ratio=actor_data.get("english_ratio"),
+            stats_updated_at=datetime.utcnow()
         )
         
         # Get actor's movies
@@ -131,8 +226,11 @@ def populate_actor_movies(session, movie_service: MovieDataService, actor_data:
                     title=movie_data["title"],
                     release_year=int(movie_data["release_date"][:4]) if movie_data.get("release_date") else None,
                     revenue=movie_data.get("revenue"),
-                    poster_path=movie_data.get("poster_path")
+                    poster_path=movie_data.get("poster_path"),
+                    original_language=movie_data.get("original_language")
                 )
+            elif not movie.original_language:
+                movie.original_language = movie_data.get("original_language")
             
             # Add movie to actor's movies with billing order
             actor.movies.append(movie)
@@ -140,13 +238,22 @@ def populate_actor_movies(session, movie_service: MovieDataService, actor_data:
         session.add(actor)
         session.commit()
         logging.info(f"Added actor {actor.name} with {len(actor.movies)} movies")
+        return True
         
     except Exception as e:
         session.rollback()
         logging.error(f"Error adding actor {actor_data['name']}: {e}")
+        return False
 
-def main():
+def main(dry_run: bool = False, as_json: bool = False):
     """Main function to initialize database and populate data"""
+    if dry_run:
+        # Only estimate the run: no tables are created and nothing is written
+        with SessionLocal() as session:
+            plan = plan_init(session, MovieDataService())
+        print(json.dumps(plan, indent=2) if as_json else format_plan(plan))
+        return plan
+    
     logging.info("Starting database initialization...")
     
     try:
@@ -157,7 +264,7 @@ def main():
         session = SessionLocal()
         
         logging.info("Fetching top actors from TMDB...")
-        top_actors = get_top_actors()
+        top_actors = get_top_actors(session)
         logging.info(f"Retrieved {len(top_actors)} actors from TMDB")
         
         if not top_actors:
@@ -194,4 +301,9 @@ if __name__ == "__main__":
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create tables and populate the top actors")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Print estimated TMDB calls and runtime without writing anything")
+    parser.add_argument('--json', action='store_true', help="Print the dry-run plan as JSON")
+    args = parser.parse_args()
+    main(dry_run=args.dry_run, as_json=args.json) 
\ No newline at end of file
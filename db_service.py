@@ -1,28 +1,119 @@
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, func, select
 from sqlalchemy.orm import sessionmaker, Session
-from models import Actor, Movie
-from typing import List, Dict, Optional
+from models import Actor, Movie, actor_movies, upgrade_schema
+from typing import Dict, Iterable, List, Optional
 import os
-from dotenv import load_dotenv
+import time
+import threading
 import logging
+from catalog import resolve_catalog_path, catalog_engine, catalog_version
+from title_index import TitleIndex
+from movie_cache import MovieCache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Environment variables (DATABASE_URL, CATALOG_PATH) are loaded from .env by the entry point
+
+CATALOG_CHECK_INTERVAL = 30  # Seconds between checks for a newer catalog version
+TITLE_INDEX_TTL = 600  # Seconds before the fuzzy title index is rebuilt from the database
+MOVIE_CACHE_CHECK_INTERVAL = 30  # Seconds between checks for a newer movie cache version
+ROSTER_SIZE = 5  # Movies dealt per game
+
+
+def actor_rosters(conn, actor_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+    """
+    Each actor's roster: their top-grossing movies, ties broken by TMDB ID.
+
+    Args:
+        conn: SQLAlchemy connection or session
+        actor_ids: Actor TMDB IDs
+
+    Returns:
+        Dict[int, List[Dict]]: Up to ``ROSTER_SIZE`` movies per actor, in the
+        shape the frontend expects
+    """
+    ids = list(set(actor_ids))
+    rosters = {}
+    for start in range(0, len(ids), 500):
+        rows = conn.execute(
+            select(actor_movies.c.actor_id, Movie.tmdb_id, Movie.title, Movie.release_year,
+                   Movie.revenue, Movie.poster_path)
+            .join(Movie, Movie.tmdb_id == actor_movies.c.movie_id)
+            .where(actor_movies.c.actor_id.in_(ids[start:start + 500]))
+            .order_by(actor_movies.c.actor_id, func.coalesce(Movie.revenue, 0).desc(), Movie.tmdb_id)
+        ).all()
+        for actor_id, tmdb_id, title, release_year, revenue, poster_path in rows:
+            roster = rosters.setdefault(actor_id, [])
+            if len(roster) >= ROSTER_SIZE or (roster and roster[-1]['id'] == tmdb_id):
+                continue  # Full, or a duplicate credit link
+            roster.append({
+                'id': tmdb_id,
+                'title': title,
+                'release_date': f"{release_year}-01-01" if release_year else None,
+                'revenue': revenue or 0,
+                'poster_path': poster_path
+            })
+    return rosters
+
 
 class DatabaseService:
     def __init__(self):
+        # Serve from a read-only catalog file when one is configured
+        self.catalog_path = os.getenv('CATALOG_PATH')
+        self.catalog_file = None
+        self.catalog_version = None
+        self._catalog_checked_at = 0.0
+        self.features_path = os.getenv('ACTOR_FEATURES_PATH', 'actor_features.npz')
+        self._features = None
+        self._title_index = None
+        self._title_index_source = None
+        self._title_index_lock = threading.Lock()
+        self._title_index_building = False
+        self.movie_cache_path = os.getenv('MOVIE_CACHE_PATH', 'movie_cache.bin')
+        self._movie_cache = None
+        self._movie_cache_checked_at = 0.0
+
+        if self.catalog_path:
+            if not self._load_catalog():
+                raise ValueError(f"No catalog found at {self.catalog_path}")
+            return
+
         database_url = os.getenv('DATABASE_URL')
         if not database_url:
             raise ValueError("DATABASE_URL not set in environment")
         self.engine = create_engine(database_url)
+        # Queries use columns added after the first release; add them to older databases
+        upgrade_schema(self.engine)
         self.SessionLocal = sessionmaker(bind=self.engine)
 
+    def _load_catalog(self) -> bool:
+        """Open the current catalog version if it differs from the one in use"""
+        self._catalog_checked_at = time.monotonic()
+        path = resolve_catalog_path(self.catalog_path)
+        if not path or path == self.catalog_file:
+            return path is not None
+
+        previous = getattr(self, 'engine', None)
+        self.engine = catalog_engine(path)
+        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.catalog_file = path
+        self.catalog_version = catalog_version(self.engine)
+        if previous is not None:
+            previous.dispose()
+        logger.info(f"Serving catalog version {self.catalog_version} from {path}")
+        return True
+
+    def current_catalog_version(self) -> Optional[str]:
+        """Version of the catalog being served, switching to a newer one if published; None without a catalog"""
+        if self.catalog_path and time.monotonic() - self._catalog_checked_at > CATALOG_CHECK_INTERVAL:
+            self._load_catalog()
+        return self.catalog_version
+
     def get_db(self) -> Session:
         """Get database session"""
+        self.current_catalog_version()
         db = self.SessionLocal()
         try:
             return db
@@ -30,8 +121,34 @@ class DatabaseService:
             db.close()
             raise e
 
-    def get_random_actor(self) -> Optional[Actor]:
-        """Get a random actor from the database"""
+    def get_actor_features(self):
+        """Get the precomputed difficulty table, reloading it after a rebuild"""
+        # Deferred so NumPy is only imported once a difficulty game is requested
+        from actor_features import ActorFeatures
+
+        if self._features is None or self._features.is_stale():
+            if not os.path.exists(self.features_path):
+                return None
+            self._features = ActorFeatures(self.features_path)
+            logger.info(f"Loaded actor features for {len(self._features.actor_ids)} actors")
+        return self._features
+
+    def get_random_actor(self, difficulty: Optional[str] = None) -> Optional[Actor]:
+        """Get a random actor from the database, optionally from a difficulty tier"""
+        if difficulty is not None:
+            from actor_features import TIERS
+            if difficulty not in TIERS:
+                raise ValueError(f"Unknown difficulty: {difficulty}")
+            features = self.get_actor_features()
+            actor_id = features.random_actor_id(difficulty) if features else None
+            if actor_id is not None:
+                with self.get_db() as db:
+                    actor = db.get(Actor, actor_id)
+                    if actor:
+                        logger.info(f"Found {difficulty} actor: {actor.name}")
+                        return actor
+            logger.warning(f"No {difficulty} actor available, falling back to uniform selection")
+
         with self.get_db() as db:
             try:
                 # First check if we have any actors at all
@@ -62,25 +179,37 @@ class DatabaseService:
                     logger.warning(f"Actor not found: {actor_name}")
                     return []
                 
-                # Convert to dictionary format expected by frontend
-                movies = []
-                for movie in sorted(actor.movies, key=lambda x: x.revenue or 0, reverse=True)[:5]:
-                    movies.append({
-                        'id': movie.tmdb_id,
-                        'title': movie.title,
-                        'release_date': f"{movie.release_year}-01-01" if movie.release_year else None,
-                        'revenue': movie.revenue or 0,
-                        'poster_path': movie.poster_path
-                    })
-                
+                movies = actor_rosters(db, [actor.tmdb_id]).get(actor.tmdb_id, [])
                 logger.info(f"Found {len(movies)} movies for {actor_name}")
                 return movies
             except Exception as e:
                 logger.error(f"Error getting actor movies: {e}")
                 raise
 
+    def get_movie_cache(self) -> Optional[MovieCache]:
+        """Get the shared movie cache, remapping it when the updater publishes a new version"""
+        if time.monotonic() - self._movie_cache_checked_at < MOVIE_CACHE_CHECK_INTERVAL:
+            return self._movie_cache
+        self._movie_cache_checked_at = time.monotonic()
+        if self._movie_cache is None or self._movie_cache.is_stale():
+            if not os.path.exists(self.movie_cache_path):
+                return self._movie_cache
+            try:
+                self._movie_cache = MovieCache(self.movie_cache_path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading movie cache: {e}")
+                return self._movie_cache
+            logger.info(f"Loaded movie cache version {self._movie_cache.version} "
+                        f"with {len(self._movie_cache)} movies")
+        return self._movie_cache
+
     def get_movie_by_id(self, movie_id: int) -> Optional[Movie]:
-        """Get movie by TMDB ID"""
+        """Get movie by TMDB ID, from the shared cache when it has the movie"""
+        cache = self.get_movie_cache()
+        record = cache.get(movie_id) if cache else None
+        if record:
+            return Movie(**record)
+
         with self.get_db() as db:
             try:
                 movie = db.query(Movie).filter(Movie.tmdb_id == movie_id).first()
@@ -112,4 +241,53 @@ class DatabaseService:
                 return result
             except Exception as e:
                 logger.error(f"Error searching movies: {e}")
-                raise 
\ No newline at end of file
+                raise 
+
+    def _build_title_index(self, source: Optional[str]) -> TitleIndex:
+        with self.get_db() as db:
+            rows = db.query(Movie.tmdb_id, Movie.title, Movie.release_year).all()
+        index = TitleIndex(rows)
+        self._title_index, self._title_index_source = index, source
+        logger.info(f"Built title index over {len(index)} movies")
+        return index
+
+    def _rebuild_title_index(self, source: Optional[str]) -> None:
+        try:
+            self._build_title_index(source)
+        except Exception as e:
+            logger.error(f"Error rebuilding title index: {e}")
+            time.sleep(CATALOG_CHECK_INTERVAL)  # Hold the flag so searches don't retry at once
+        finally:
+            self._title_index_building = False
+
+    def get_title_index(self) -> TitleIndex:
+        """
+        Get the fuzzy title index, rebuilding it after a catalog change or TTL.
+
+        Only the first build happens in the request; later rebuilds run in a
+        background thread while the stale index keeps serving searches.
+        """
+        index = self._title_index
+        source = self.catalog_file if self.catalog_path else None
+        if index is None:
+            with self._title_index_lock:
+                return self._title_index or self._build_title_index(source)
+        if source != self._title_index_source or \
+                (not self.catalog_path and time.monotonic() - index.built_at > TITLE_INDEX_TTL):
+            with self._title_index_lock:
+                if self._title_index_building:
+                    return index
+                self._title_index_building = True
+            threading.Thread(target=self._rebuild_title_index, args=(source,),
+                             name='title-index', daemon=True).start()
+        return index
+
+    def suggest_movies(self, query: str) -> List[Dict]:
+        """Typo-tolerant search over catalog titles"""
+        try:
+            result = self.get_title_index().search(query)
+            logger.info(f"Found {len(result)} fuzzy matches for '{query}'")
+            return result
+        except Exception as e:
+            logger.error(f"Error suggesting movies: {e}")
+            return []
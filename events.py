@@ -0,0 +1,152 @@
+from batch_writer import BatchWriter
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List
+import argparse
+import glob
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rotate a worker's log once it grows past this size
+MAX_LOG_BYTES = 64 * 1024 * 1024
+ACTIVE_SUFFIX = '.jsonl'
+
+
+class EventLog:
+    """
+    Append-only gameplay event log.
+
+    Routes call ``emit`` which only enqueues a compact dict; a background
+    ``BatchWriter`` appends batches as JSON lines to a per-process file and
+    rotates it by size. Each process writes its own file so concurrent
+    gunicorn workers never interleave partial lines.
+    """
+
+    def __init__(self, log_dir: str, max_bytes: int = MAX_LOG_BYTES, max_queue: int = 10000):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        os.makedirs(log_dir, exist_ok=True)
+        self.writer = BatchWriter(self._append, name='event-writer', max_batch=500, max_queue=max_queue)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.log_dir, f"events.{os.getpid()}{ACTIVE_SUFFIX}")
+
+    def emit(self, event: str, **fields) -> bool:
+        """Queue an event without blocking; returns False if it was dropped"""
+        fields['e'] = event
+        fields['t'] = round(time.time(), 3)
+        return self.writer.submit(fields)
+
+    def stats(self) -> Dict:
+        return self.writer.stats()
+
+    def _append(self, events: List[Dict]) -> None:
+        path = self.path
+        data = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(data)
+            size = f.tell()
+        if size >= self.max_bytes:
+            rotated = path[:-len(ACTIVE_SUFFIX)] + time.strftime('.%Y%m%d%H%M%S') + ACTIVE_SUFFIX
+            os.replace(path, rotated)
+            logger.info(f"Rotated event log to {rotated}")
+
+
+def read_events(log_dir: str) -> Iterator[Dict]:
+    """Yield every event from active and rotated logs, skipping damaged lines"""
+    for path in sorted(glob.glob(os.path.join(log_dir, f"events.*{ACTIVE_SUFFIX}"))):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def aggregate(events: Iterator[Dict], min_games: int = 1) -> Dict:
+    """
+    Aggregate per-actor difficulty, strike distribution and tried titles.
+
+    Args:
+        events: Events from ``read_events``
+        min_games (int): Leave out actors with fewer finished games
+
+    Returns:
+        Dict: ``actors`` sorted hardest first, ``strike_distribution`` and
+        ``wrong_titles`` (most tried incorrect guesses)
+    """
+    actors = defaultdict(lambda: {'name': None, 'started': 0, 'finished': 0, 'won': 0,
+                                  'strikes': 0, 'found': 0, 'guesses': 0})
+    strike_distribution = Counter()
+    wrong_titles = Counter()
+
+    for event in events:
+        kind = event.get('e')
+        stats = actors[event.get('a')]
+        if kind == 'start':
+            stats['name'] = event.get('n')
+            stats['started'] += 1
+        elif kind == 'guess':
+            stats['guesses'] += 1
+            if not event.get('c'):
+                wrong_titles[event.get('title') or str(event.get('m'))] += 1
+        elif kind == 'end':
+            stats['finished'] += 1
+            stats['won'] += 1 if event.get('won') else 0
+            stats['strikes'] += event.get('s', 0)
+            stats['found'] += event.get('f', 0)
+            strike_distribution[event.get('s', 0)] += 1
+
+    report = []
+    for actor_id, stats in actors.items():
+        if actor_id is None or stats['finished'] < min_games:
+            continue
+        finished = stats['finished']
+        report.append({
+            'actor_id': actor_id,
+            'name': stats['name'],
+            'games': finished,
+            'abandoned': max(stats['started'] - finished, 0),
+            'solve_rate': round(stats['won'] / finished, 3),
+            'avg_found': round(stats['found'] / finished, 2),
+            'avg_strikes': round(stats['strikes'] / finished, 2),
+        })
+    report.sort(key=lambda row: (row['solve_rate'], row['avg_found']))
+
+    return {
+        'actors': report,
+        'strike_distribution': {str(k): v for k, v in sorted(strike_distribution.items())},
+        'wrong_titles': wrong_titles.most_common(20),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate gameplay events offline")
+    parser.add_argument('log_dir', nargs='?', default=os.getenv('EVENT_LOG_DIR', 'events'))
+    parser.add_argument('--min-games', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    report = aggregate(read_events(args.log_dir), min_games=args.min_games)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("Hardest actors:")
+    for row in report['actors'][:20]:
+        print(f"  {row['name']}: solve rate {row['solve_rate']:.0%} over {row['games']} games, "
+              f"avg {row['avg_found']} found, {row['avg_strikes']} strikes")
+    print("Strike distribution:")
+    for strikes, count in report['strike_distribution'].items():
+        print(f"  {strikes}: {count}")
+    print("Most tried wrong titles:")
+    for title, count in report['wrong_titles']:
+        print(f"  {title}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from typing import Dict, List
+
+MAX_STRIKES = 3
+MAX_MOVIE_ID = 2 ** 31 - 1  # TMDB IDs are stored in 32-bit integer columns
+
+# Session keys that make up the state of a game in progress
+GAME_STATE_KEYS = ('correct_movies', 'correct_movie_ids', 'guessed_movies', 'strikes', 'game_over')
+
+
+class GuessError(ValueError):
+    """Raised when a guess cannot be played (game over or already guessed)"""
+    pass
+
+
+def parse_movie_id(value) -> int:
+    """
+    Read a guessed TMDB ID from a request.
+
+    Raises:
+        GuessError: If the value is not a positive integer ID that fits the database
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise GuessError(f'Invalid movie_id: {value!r}')
+    try:
+        movie_id = int(value)
+    except ValueError:
+        raise GuessError(f'Invalid movie_id: {value!r}')
+    if not 0 < movie_id <= MAX_MOVIE_ID:
+        raise GuessError(f'Invalid movie_id: {value!r}')
+    return movie_id
+
+
+def new_game_state(correct_movies: List[Dict]) -> Dict:
+    """Initial state for a game over the given roster"""
+    return {
+        'correct_movies': correct_movies,
+        'correct_movie_ids': [str(movie['id']) for movie in correct_movies],
+        'guessed_movies': [],
+        'strikes': 0,
+        'game_over': False,
+    }
+
+
+def check_guess(state: Dict, movie_id: str) -> None:
+    """
+    Reject a guess that cannot be played, before any lookups are spent on it.
+
+    Raises:
+        GuessError: If the game is over or the movie was already guessed
+    """
+    if state.get('game_over'):
+        raise GuessError('Game is over')
+    if movie_id in [str(m['id']) for m in state['guessed_movies']]:
+        raise GuessError('Movie already guessed')
+
+
+def apply_guess(state: Dict, movie_id: str, movie_details: Dict) -> Dict:
+    """
+    Score one guess, updating the game state in place.
+
+    Args:
+        state (Dict): Game state with the ``GAME_STATE_KEYS``
+        movie_id (str): Guessed TMDB ID
+        movie_details (Dict): Movie shown to the player if the guess is correct
+
+    Returns:
+        Dict: Response body for the guess; ``game_over`` is set once the
+        roster is complete or the strikes run out
+
+    Raises:
+        GuessError: If the game is over or the movie was already guessed
+    """
+    check_guess(state, movie_id)
+    correct_movies = state['correct_movies']
+    guessed_movies = state['guessed_movies']
+
+    if movie_id in state['correct_movie_ids']:
+        guessed_movies.append(movie_details)
+
+        # Calculate highest revenue
+        highest_revenue = max([m['revenue'] for m in guessed_movies])
+
+        # Sort correct movies by revenue to get true rankings
+        sorted_correct_movies = sorted(correct_movies, key=lambda x: x['revenue'], reverse=True)
+        true_rank = next(i + 1 for i, m in enumerate(sorted_correct_movies)
+                         if str(m['id']) == str(movie_id))
+
+        # Check if all movies found
+        if len(guessed_movies) == len(correct_movies):
+            state['game_over'] = True
+            return {
+                'correct': True,
+                'message': 'Congratulations! You found all movies!',
+                'game_over': True,
+                'guessed_movies': guessed_movies,
+                'strikes': state['strikes'],
+                'highest_revenue': highest_revenue,
+                'true_rank': true_rank
+            }
+
+        return {
+            'correct': True,
+            'message': 'Correct guess!',
+            'guessed_movies': guessed_movies,
+            'strikes': state['strikes'],
+            'game_over': False,
+            'highest_revenue': highest_revenue,
+            'true_rank': true_rank
+        }
+
+    # Handle incorrect guess
+    state['strikes'] = state.get('strikes', 0) + 1
+
+    # Check if game is over due to strikes
+    if state['strikes'] >= MAX_STRIKES:
+        state['game_over'] = True
+        return {
+            'correct': False,
+            'message': 'Game Over! Too many incorrect guesses.',
+            'game_over': True,
+            'correct_movies': sorted(correct_movies, key=lambda x: x['revenue'], reverse=True),
+            'strikes': state['strikes'],
+            'highest_revenue': max([m['revenue'] for m in correct_movies])
+        }
+
+    return {
+        'correct': False,
+        'message': 'Incorrect guess!',
+        'guessed_movies': guessed_movies,
+        'strikes': state['strikes'],
+        'game_over': False
+    }
@@ -0,0 +1,227 @@
+from resilience import CircuitBreaker, CircuitOpenError
+from typing import BinaryIO, Optional, Tuple
+from urllib.parse import urlencode
+import hashlib
+import hmac
+import io
+import logging
+import os
+import threading
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each served variant
+VARIANTS = {
+    'thumb': 160,
+    'card': 400,
+}
+TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
+FETCH_TIMEOUT = 5  # seconds
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+JPEG_QUALITY = 82
+
+
+class ImageProxyError(Exception):
+    """Raised when an upstream image cannot be fetched or decoded"""
+    pass
+
+
+class UnsafeImageError(ImageProxyError):
+    """Raised when an upstream image would decode to more pixels than Pillow allows"""
+    pass
+
+
+class ImageProxy:
+    """
+    Fetches remote images once, stores resized variants on local disk and
+    evicts the least recently used files once the cache exceeds its size cap.
+    The cap applies to the directory, which all workers share.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, secret_key: str):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.secret_key = secret_key.encode('utf-8')
+        self._lock = threading.Lock()
+        # Posters and headshots share one breaker so a CDN outage fails fast
+        self.breaker = CircuitBreaker('images')
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def sign(self, url: str) -> str:
+        """Sign a source URL so the proxy cannot be used for arbitrary hosts"""
+        return hmac.new(self.secret_key, url.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+    def verify(self, url: str, signature: str) -> bool:
+        return bool(url) and hmac.compare_digest(self.sign(url), signature or '')
+
+    def proxied_url(self, url: Optional[str], variant: str = 'card') -> Optional[str]:
+        """Build the local URL that serves ``url`` through the proxy"""
+        if not url:
+            return None
+        return f"/image/{variant}?" + urlencode({'src': url, 'sig': self.sign(url)})
+
+    @staticmethod
+    def poster_source(poster_path: str) -> str:
+        """Upstream URL for a TMDB poster path"""
+        return f"{TMDB_IMAGE_BASE}/{poster_path.lstrip('/')}"
+
+    def poster_url(self, poster_path: Optional[str], variant: str = 'card') -> Optional[str]:
+        """Build the signed local URL that serves a TMDB poster through the proxy"""
+        if not poster_path:
+            return None
+        return f"/poster/{variant}/{poster_path.lstrip('/')}?" + \
+            urlencode({'sig': self.sign(self.poster_source(poster_path))})
+
+    @staticmethod
+    def cache_key(url: str, variant: str) -> str:
+        """Stable key for a source URL and variant, also used as the ETag"""
+        return hashlib.sha256(f"{variant}:{url}".encode('utf-8')).hexdigest()[:40]
+
+    def get(self, url: str, variant: str) -> Tuple[str, str]:
+        """
+        Get a cached image variant, fetching and resizing it on a miss.
+
+        Args:
+            url (str): Upstream image URL
+            variant (str): One of ``VARIANTS``
+
+        Returns:
+            Tuple[str, str]: Path of the cached file and its cache key
+
+        Raises:
+            ImageProxyError: If the upstream image cannot be fetched
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown image variant: {variant}")
+
+        key = self.cache_key(url, variant)
+        path = os.path.join(self.cache_dir, f"{key}.jpg")
+        try:
+            os.utime(path)  # Mark as recently used
+            return path, key
+        except FileNotFoundError:
+            pass
+
+        data = self._resize(self._fetch(url), VARIANTS[variant])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        # Measured on disk so files written by other workers count too; only misses pay for it
+        with self._lock:
+            self._evict()
+        return path, key
+
+    def open(self, url: str, variant: str) -> Tuple[BinaryIO, str]:
+        """
+        Like ``get``, but return the cached file already open.
+
+        An open file stays readable after another worker evicts it, so it can
+        be streamed without racing the eviction.
+
+        Returns:
+            Tuple[BinaryIO, str]: Open cached file and its cache key
+
+        Raises:
+            ImageProxyError: If the upstream image cannot be fetched
+        """
+        for _ in range(2):
+            path, key = self.get(url, variant)
+            try:
+                return open(path, 'rb'), key
+            except FileNotFoundError:
+                continue  # Evicted between get() and open(); fetch it again
+        raise ImageProxyError(f"Cached image evicted while opening: {url}")
+
+    @staticmethod
+    def mimetype(f: BinaryIO) -> str:
+        """Detect the stored format, which is only guaranteed JPEG when Pillow is installed"""
+        head = f.read(12)
+        f.seek(0)
+        if head.startswith(b'\x89PNG'):
+            return 'image/png'
+        if head.startswith(b'GIF8'):
+            return 'image/gif'
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'image/webp'
+        return 'image/jpeg'
+
+    def _fetch(self, url: str) -> bytes:
+        try:
+            trial = self.breaker.before_call()
+        except CircuitOpenError as e:
+            raise ImageProxyError(str(e))
+        try:
+            response = requests.get(url, timeout=FETCH_TIMEOUT, stream=True)
+            # Only upstream trouble trips the breaker; a missing image is the caller's problem
+            if response.status_code >= 500 or response.status_code == 429:
+                response.close()
+                response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            raise ImageProxyError(f"Error fetching image: {str(e)}")
+        else:
+            self.breaker.record_success()
+        finally:
+            self.breaker.end_call(trial)
+
+        # Closing returns the connection to the pool even when the body is not read
+        with response:
+            try:
+                response.raise_for_status()
+                if not response.headers.get('Content-Type', '').startswith('image/'):
+                    raise ImageProxyError(f"Not an image: {url}")
+                data = response.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+                if len(data) > MAX_SOURCE_BYTES:
+                    raise ImageProxyError(f"Image too large: {url}")
+                return data
+            except requests.exceptions.RequestException as e:
+                raise ImageProxyError(f"Error fetching image: {str(e)}")
+
+    @staticmethod
+    def _resize(data: bytes, max_edge: int) -> bytes:
+        """Downscale to fit ``max_edge`` and re-encode as JPEG"""
+        try:
+            from PIL import Image
+        except ImportError:  # Pillow is optional; without it images are cached unresized
+            return data
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.thumbnail((max_edge, max_edge))
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            out = io.BytesIO()
+            image.save(out, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            return out.getvalue()
+        except Image.DecompressionBombError as e:
+            raise UnsafeImageError(f"Image too large to decode: {str(e)}")
+        except OSError as e:
+            raise ImageProxyError(f"Error decoding image: {str(e)}")
+
+    def _evict(self) -> None:
+        """If the cache directory is over its cap, delete least recently used files until it is under 90%"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if entry.is_file() and entry.name.endswith('.jpg'):
+                    entries.append((entry, entry.stat()))
+            except FileNotFoundError:
+                continue  # Another worker evicted it while we scanned
+        total = sum(stat.st_size for _, stat in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort(key=lambda item: item[1].st_mtime)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for entry, stat in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(entry.path)
+                total -= stat.st_size
+                removed += 1
+            except FileNotFoundError:
+                total -= stat.st_size  # Another worker evicted it first
+        logger.info(f"Evicted {removed} cached images, cache now {total} bytes")
@@ -0,0 +1,278 @@
+from sqlalchemy import func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from models import GameResult
+from batch_writer import BatchWriter
+from datetime import datetime, date, UTC
+from typing import Dict, List, Optional
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAX_STRIKES = 3
+MAX_MOVIES = 5
+RETAIN_PER_BUCKET = 100  # Entries kept per score bucket for top-N queries
+RELOAD_INTERVAL = 60  # Seconds between reloads to pick up other workers' results
+RETRY_INTERVAL = 10  # Seconds before retrying after the results database failed
+SCOPES = ('daily', 'all_time')
+
+
+def score_bucket(movies_found: int, strikes: int) -> int:
+    """
+    Map a result onto a small integer where higher is better.
+
+    More movies found always wins; among equal finds, fewer strikes wins.
+    """
+    movies_found = max(0, min(movies_found, MAX_MOVIES))
+    strikes = max(0, min(strikes, MAX_STRIKES))
+    return movies_found * (MAX_STRIKES + 1) + (MAX_STRIKES - strikes)
+
+
+NUM_BUCKETS = score_bucket(MAX_MOVIES, 0) + 1
+
+
+class RankedBoard:
+    """
+    Order-statistic structure over score buckets.
+
+    The score space is tiny (movies found x strikes), so a Fenwick tree over
+    bucket counts answers "how many results beat this one" in O(log buckets),
+    and each bucket keeps its earliest entries in finish order for top-N.
+    Ties rank by who finished first.
+    """
+
+    def __init__(self, retain: int = RETAIN_PER_BUCKET):
+        self.retain = retain
+        self._tree = [0] * (NUM_BUCKETS + 1)
+        self._counts = [0] * NUM_BUCKETS
+        self._entries: List[List[Dict]] = [[] for _ in range(NUM_BUCKETS)]
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+    def _add_count(self, bucket: int, amount: int) -> None:
+        # Trees are indexed from the best bucket so prefix sums count better results
+        i = NUM_BUCKETS - bucket
+        while i <= NUM_BUCKETS:
+            self._tree[i] += amount
+            i += i & -i
+
+    def count_better(self, bucket: int) -> int:
+        """Number of results in strictly better buckets"""
+        i = NUM_BUCKETS - bucket - 1
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def rank_of(self, bucket: int) -> int:
+        """Rank a result in this bucket would get if it finished now"""
+        return self.count_better(bucket) + self._counts[bucket] + 1
+
+    def add(self, entry: Dict, bucket: int) -> int:
+        """Insert a result that finished after all existing ones and return its rank"""
+        rank = self.rank_of(bucket)
+        self._counts[bucket] += 1
+        self._add_count(bucket, 1)
+        if len(self._entries[bucket]) < self.retain:
+            self._entries[bucket].append(entry)
+        return rank
+
+    def add_bucket_count(self, bucket: int, count: int, entries: List[Dict]) -> None:
+        """Bulk-load a bucket's total count and its earliest entries"""
+        self._counts[bucket] += count
+        self._add_count(bucket, count)
+        self._entries[bucket].extend(entries[:self.retain - len(self._entries[bucket])])
+
+    def top(self, limit: int) -> List[Dict]:
+        """Best results, ranked"""
+        results = []
+        for bucket in range(NUM_BUCKETS - 1, -1, -1):
+            for entry in self._entries[bucket]:
+                if len(results) >= limit:
+                    return results
+                results.append(dict(entry, rank=len(results) + 1))
+        return results
+
+
+class Leaderboard:
+    """
+    High scores kept in memory per scope, persisted through a batched
+    background writer so recording a result never waits on the database.
+
+    Boards are loaded by a background thread, so neither construction nor
+    requests wait on the database; while it is unreachable the boards only
+    hold this worker's results and loading is retried every
+    ``RETRY_INTERVAL`` seconds.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        """
+        Args:
+            engine: Writable database for results; without one scores are kept
+                in memory only
+        """
+        self.engine = engine
+        self.session_factory = sessionmaker(bind=engine) if engine is not None else None
+        self.writer = None
+        if engine is not None:
+            self.writer = BatchWriter(self._persist, name='leaderboard-writer')
+        self._lock = threading.Lock()
+        # Held while a batch is committed and while boards are loaded, so a
+        # reload sees each result either in the database or still pending
+        self._persist_lock = threading.Lock()
+        self._pending: Dict[int, Dict] = {}  # Submitted results not yet written, by id()
+        self._all_time = RankedBoard()
+        self._daily_date = datetime.now(UTC).date()
+        self._daily = RankedBoard()
+        self._stopping = threading.Event()
+        if engine is not None:
+            threading.Thread(target=self._load_loop, name='leaderboard-loader', daemon=True).start()
+
+    def _load_loop(self) -> None:
+        """Create the results table, then reload the boards periodically"""
+        table_ready = False
+        while not self._stopping.is_set():
+            loaded = False
+            try:
+                if not table_ready:
+                    GameResult.__table__.create(self.engine, checkfirst=True)
+                    table_ready = True
+                loaded = self.reload()
+            except Exception as e:
+                logger.error(f"Error preparing leaderboard table: {e}")
+            self._stopping.wait(RELOAD_INTERVAL if loaded else RETRY_INTERVAL)
+
+    def close(self) -> None:
+        """Stop the loader thread"""
+        self._stopping.set()
+
+    def _persist(self, results: List[Dict]) -> None:
+        with self._persist_lock:
+            try:
+                with self.session_factory() as session:
+                    session.execute(GameResult.__table__.insert(), results)
+                    session.commit()
+            finally:
+                # Failed batches are dropped by the writer, so stop showing them too
+                with self._lock:
+                    for result in results:
+                        self._pending.pop(id(result), None)
+
+    def _load_board(self, session, since: Optional[datetime] = None) -> RankedBoard:
+        board = RankedBoard()
+        query = session.query(GameResult.movies_found, GameResult.strikes, func.count())
+        if since is not None:
+            query = query.filter(GameResult.finished_at >= since)
+        for movies_found, strikes, count in query.group_by(GameResult.movies_found, GameResult.strikes):
+            entries_query = session.query(GameResult)\
+                                   .filter(GameResult.movies_found == movies_found)\
+                                   .filter(GameResult.strikes == strikes)
+            if since is not None:
+                entries_query = entries_query.filter(GameResult.finished_at >= since)
+            entries = entries_query.order_by(GameResult.finished_at, GameResult.id)\
+                                   .limit(RETAIN_PER_BUCKET)\
+                                   .all()
+            board.add_bucket_count(score_bucket(movies_found, strikes), count,
+                                   [self._entry(result.__dict__) for result in entries])
+        return board
+
+    def reload(self) -> bool:
+        """Rebuild the in-memory boards from persisted results, returning False on failure"""
+        if not self.session_factory:
+            return False
+        today = datetime.now(UTC).date()
+        day_start = datetime(today.year, today.month, today.day)
+        with self._persist_lock:
+            try:
+                with self.session_factory() as session:
+                    all_time = self._load_board(session)
+                    daily = self._load_board(session, since=day_start)
+            except Exception as e:
+                logger.error(f"Error loading leaderboard: {e}")
+                return False
+            with self._lock:
+                # Results still queued in the writer are not in the database yet
+                for result in self._pending.values():
+                    entry = self._entry(result)
+                    bucket = score_bucket(result['movies_found'], result['strikes'])
+                    all_time.add(entry, bucket)
+                    if result['finished_at'].date() == today:
+                        daily.add(entry, bucket)
+                self._all_time, self._daily, self._daily_date = all_time, daily, today
+        logger.info(f"Loaded leaderboard with {len(all_time)} results ({len(daily)} today)")
+        return True
+
+    def _roll_day(self, today: date) -> None:
+        if today != self._daily_date:
+            self._daily_date = today
+            self._daily = RankedBoard()
+
+    @staticmethod
+    def _entry(result: Dict) -> Dict:
+        finished_at = result['finished_at']
+        if finished_at.tzinfo is None:
+            # Stored timestamps come back naive; they are UTC like the in-memory ones
+            finished_at = finished_at.replace(tzinfo=UTC)
+        return {
+            'player_name': result.get('player_name') or 'Anonymous',
+            'actor_name': result['actor_name'],
+            'movies_found': result['movies_found'],
+            'total_movies': result['total_movies'],
+            'strikes': result['strikes'],
+            'finished_at': finished_at.isoformat(),
+        }
+
+    def record(self, actor_id: int, actor_name: str, movies_found: int, total_movies: int,
+               strikes: int, player_name: Optional[str] = None) -> Dict[str, int]:
+        """
+        Record a finished game.
+
+        Returns:
+            Dict[str, int]: The game's rank in each scope
+        """
+        # Naive UTC, as the column stores it and as reload() filters on it
+        finished_at = datetime.now(UTC).replace(tzinfo=None)
+        result = {
+            'actor_id': actor_id,
+            'actor_name': actor_name,
+            'player_name': (player_name or '')[:64] or None,
+            'movies_found': movies_found,
+            'total_movies': total_movies,
+            'strikes': strikes,
+            'finished_at': finished_at,
+        }
+        entry = self._entry(result)
+        bucket = score_bucket(movies_found, strikes)
+        with self._lock:
+            self._roll_day(finished_at.date())
+            ranks = {
+                'all_time': self._all_time.add(entry, bucket),
+                'daily': self._daily.add(entry, bucket),
+            }
+            if self.writer:
+                self._pending[id(result)] = result
+        if self.writer and not self.writer.submit(result):
+            with self._lock:
+                self._pending.pop(id(result), None)
+        return ranks
+
+    def top(self, scope: str = 'all_time', limit: int = 10) -> List[Dict]:
+        """Best results for a scope"""
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown leaderboard scope: {scope}")
+        with self._lock:
+            self._roll_day(datetime.now(UTC).date())
+            board = self._daily if scope == 'daily' else self._all_time
+            return board.top(limit)
+
+    def rank_for(self, movies_found: int, strikes: int, scope: str = 'all_time') -> int:
+        """Rank a result with this score would get if recorded now"""
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown leaderboard scope: {scope}")
+        bucket = score_bucket(movies_found, strikes)
+        with self._lock:
+            board = self._daily if scope == 'daily' else self._all_time
+            return board.rank_of(bucket)
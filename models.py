@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, DateTime, BigInteger, Table
+from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, DateTime, BigInteger, Float, Table, Index, Text, UniqueConstraint, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, UTC
@@ -12,14 +12,23 @@ actor_movies = Table(
     Column('actor_id', Integer, ForeignKey('actors.tmdb_id')),
     Column('movie_id', Integer, ForeignKey('movies.tmdb_id')),
     Column('order', Integer),  # Actor's billing order in the movie
+    Index('ix_actor_movies_actor_id', 'actor_id'),
+    Index('ix_actor_movies_movie_id', 'movie_id'),
 )
 
+# Tables that make up the game catalog, in foreign-key load order
+CATALOG_TABLES = ('actors', 'movies', 'actor_movies')
+
+
 class Actor(Base):
     __tablename__ = 'actors'
 
     tmdb_id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     popularity = Column(Integer)  # TMDB popularity score
+    movie_credit_count = Column(Integer)  # Total TMDB movie credits when last qualified
+    english_ratio = Column(Float)  # Share of recent credits in English-language films
+    stats_updated_at = Column(DateTime)  # When the two stats above were last computed
     last_updated = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
     
     movies = relationship(
@@ -28,6 +37,7 @@ class Actor(Base):
         back_populates='actors'
     )
 
+
 class Movie(Base):
     __tablename__ = 'movies'
 
@@ -36,9 +46,97 @@ class Movie(Base):
     release_year = Column(Integer)
     revenue = Column(BigInteger)
     poster_path = Column(String(255))
+    original_language = Column(String(8))  # ISO 639-1 code, e.g. 'en'
     
     actors = relationship(
         'Actor',
         secondary=actor_movies,
         back_populates='movies'
-    ) 
\ No newline at end of file
+    )
+
+
+class MovieLanguage(Base):
+    __tablename__ = 'movie_languages'
+
+    # Languages of movies outside the catalog, fetched while checking English ratios
+    tmdb_id = Column(Integer, primary_key=True)
+    original_language = Column(String(8), nullable=False)
+
+
+class GameResult(Base):
+    __tablename__ = 'game_results'
+
+    id = Column(Integer, primary_key=True)
+    actor_id = Column(Integer, index=True)  # Not a foreign key so results outlive catalog cleanup
+    actor_name = Column(String(255), nullable=False)
+    player_name = Column(String(64))
+    movies_found = Column(Integer, nullable=False)
+    total_movies = Column(Integer, nullable=False)
+    strikes = Column(Integer, nullable=False)
+    finished_at = Column(DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None), index=True)  # Naive UTC
+
+
+class CrawlTask(Base):
+    __tablename__ = 'crawl_tasks'
+    __table_args__ = (
+        UniqueConstraint('kind', 'key', name='uq_crawl_tasks_kind_key'),
+        Index('ix_crawl_tasks_claim', 'status', 'available_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)  # 'popular_page' or 'actor'
+    key = Column(Integer, nullable=False)  # Page number or actor TMDB ID
+    payload = Column(Text)  # JSON passed from the task that enqueued this one
+    status = Column(String(16), nullable=False, default='pending')  # pending, leased, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, default=lambda: datetime.now(UTC))  # Retry backoff
+    lease_owner = Column(String(64))
+    lease_expires_at = Column(DateTime)
+    last_error = Column(Text)
+    updated_at = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+
+
+class RateBudget(Base):
+    __tablename__ = 'rate_budgets'
+
+    name = Column(String(32), primary_key=True)  # Upstream the budget applies to, e.g. 'tmdb'
+    tokens = Column(Float, nullable=False)
+    refilled_at = Column(Float, nullable=False)  # Unix time of the last refill
+    version = Column(Integer, nullable=False, default=0)  # Compare-and-set guard
+
+
+def missing_schema(engine):
+    """Tables (``name``) and columns (``table.column``) the models define but the database lacks.
+
+    Read-only, for callers such as dry runs that must not call ``upgrade_schema``.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            missing.append(table.name)
+            continue
+        present = {column['name'] for column in inspector.get_columns(table.name)}
+        missing += [f'{table.name}.{column.name}' for column in table.columns if column.name not in present]
+    return missing
+
+
+def upgrade_schema(engine):
+    """Add columns introduced after a table was first created.
+
+    ``create_all`` only creates missing tables, so existing databases need the
+    newer nullable columns added in place.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
@@ -0,0 +1,164 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Engine
+from models import Movie
+from typing import Dict, Optional
+import argparse
+import logging
+import mmap
+import os
+import struct
+import time
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# File layout: header, open-addressing slot table, packed movie records.
+# Workers map the file read-only, so every process on the host shares one
+# copy through the page cache instead of holding its own dictionary.
+MAGIC = b'MVC1'
+HEADER = struct.Struct('<4sQII')  # magic, version, slot count, record count
+SLOT = struct.Struct('<qII')  # tmdb_id (0 = empty), record offset, record length
+RECORD = struct.Struct('<qiHH')  # revenue, release year (0 = unknown), title bytes, poster bytes
+MAX_LOAD_FACTOR = 0.5
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15  # Fibonacci hashing spreads sequential IDs
+_MASK64 = (1 << 64) - 1
+
+
+def _slot_index(tmdb_id: int, mask: int, shift: int) -> int:
+    return ((tmdb_id * _HASH_MULTIPLIER) & _MASK64) >> shift & mask
+
+
+def _table_size(count: int) -> int:
+    """Smallest power of two keeping the table at most half full"""
+    size = 8
+    while size * MAX_LOAD_FACTOR < count:
+        size *= 2
+    return size
+
+
+def _pack_record(revenue, release_year, title: str, poster_path) -> bytes:
+    title_bytes = title.encode('utf-8')
+    poster_bytes = (poster_path or '').encode('utf-8')
+    return RECORD.pack(revenue or 0, release_year or 0, len(title_bytes), len(poster_bytes)) \
+        + title_bytes + poster_bytes
+
+
+def build_movie_cache(engine: Engine, path: str) -> str:
+    """
+    Write the tmdb_id -> movie lookup file and atomically replace the old one.
+
+    Args:
+        engine: Database holding the catalog
+        path (str): Cache file to (re)write
+
+    Returns:
+        str: Path of the cache file
+    """
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Movie.tmdb_id, Movie.revenue, Movie.release_year, Movie.title, Movie.poster_path)
+        ).all()
+
+    size = _table_size(len(rows))
+    mask, shift = size - 1, 64 - size.bit_length() + 1
+    slots = bytearray(size * SLOT.size)
+    data = bytearray()
+    data_start = HEADER.size + len(slots)
+
+    for tmdb_id, revenue, release_year, title, poster_path in rows:
+        record = _pack_record(revenue, release_year, title, poster_path)
+        index = _slot_index(tmdb_id, mask, shift)
+        while SLOT.unpack_from(slots, index * SLOT.size)[0]:
+            index = (index + 1) & mask
+        SLOT.pack_into(slots, index * SLOT.size, tmdb_id, data_start + len(data), len(record))
+        data += record
+
+    # The version changes on every build; readers compare it to decide when to remap
+    version = time.time_ns()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, version, size, len(rows)))
+        f.write(slots)
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Built movie cache for {len(rows)} movies ({data_start + len(data)} bytes) "
+                f"in {time.perf_counter() - start:.2f}s")
+    return path
+
+
+def read_version(path: str) -> Optional[int]:
+    """Version stamp of a cache file without mapping it, or None if missing"""
+    try:
+        with open(path, 'rb') as f:
+            magic, version, _, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return version if magic == MAGIC else None
+
+
+class MovieCache:
+    """Read-only view of a cache file, shared between processes through mmap"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, size, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a movie cache file: {path}")
+        self._mask, self._shift = size - 1, 64 - size.bit_length() + 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, tmdb_id: int) -> Optional[Dict]:
+        """Look up a movie record, or None if the ID is not in the cache"""
+        if tmdb_id <= 0:
+            return None
+        buf = self._map
+        index = _slot_index(tmdb_id, self._mask, self._shift)
+        while True:
+            key, offset, _ = SLOT.unpack_from(buf, HEADER.size + index * SLOT.size)
+            if key == tmdb_id:
+                break
+            if key == 0:
+                return None
+            index = (index + 1) & self._mask
+
+        revenue, release_year, title_len, poster_len = RECORD.unpack_from(buf, offset)
+        offset += RECORD.size
+        title = buf[offset:offset + title_len].decode('utf-8')
+        offset += title_len
+        poster_path = buf[offset:offset + poster_len].decode('utf-8')
+        return {
+            'tmdb_id': tmdb_id,
+            'title': title,
+            'release_year': release_year or None,
+            'revenue': revenue,
+            'poster_path': poster_path or None,
+        }
+
+    def is_stale(self) -> bool:
+        """True once the updater has published a cache with a different version"""
+        version = read_version(self.path)
+        return version is not None and version != self.version
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Build the shared movie lookup cache")
+    parser.add_argument('path', nargs='?', default=os.getenv('MOVIE_CACHE_PATH', 'movie_cache.bin'))
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in environment")
+    build_movie_cache(create_engine(database_url), args.path)
+
+
+if __name__ == "__main__":
+    main()
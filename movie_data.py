@@ -1,14 +1,16 @@
-from tmdbv3api import TMDb, Person, Movie
-from bs4 import BeautifulSoup
 from typing import List, Optional, Dict
 import time
 from functools import lru_cache
+import logging
 import os
-from dotenv import load_dotenv
 import requests
+from resilience import CircuitBreaker, CircuitOpenError
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Environment variables (TMDB_TOKEN, timeouts) are loaded from .env by the entry point
+
+CONNECT_TIMEOUT = 3.05  # seconds
 
 class TMDBError(Exception):
     """Custom exception for TMDB API errors"""
@@ -16,21 +18,67 @@ class TMDBError(Exception):
 
 class MovieDataService:
     def __init__(self, access_token: Optional[str] = None):
-        self.tmdb = TMDb()
-        self.tmdb.access_token = access_token or os.getenv('TMDB_TOKEN')
-        self.person = Person()
+        self.access_token = access_token or os.getenv('TMDB_TOKEN')
 
-        if not self.tmdb.access_token:
+        if not self.access_token:
             raise ValueError("TMDB access token is required. Set TMDB_TOKEN in .env file or pass to constructor.")
         
         # Set up headers for API requests
         self.headers = {
-            "Authorization": f"Bearer {self.tmdb.access_token}",
+            "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json;charset=utf-8"
         }
         
         self.base_url = "https://api.themoviedb.org/3"
         self.cache_timeout = 3600  # 1 hour
+        
+        # (connect, read) timeouts; requests waits forever without them
+        self.tmdb_timeout = (CONNECT_TIMEOUT, float(os.getenv('TMDB_TIMEOUT', '5')))
+        self.image_search_timeout = (CONNECT_TIMEOUT, float(os.getenv('IMAGE_SEARCH_TIMEOUT', '3')))
+        
+        # One breaker per upstream so a Google outage does not block TMDB calls
+        self.breakers = {
+            'tmdb': CircuitBreaker('tmdb'),
+            'google_images': CircuitBreaker('google_images'),
+        }
+        
+        # Optional limiter shared by crawler processes; acquire() blocks until a TMDB call is allowed
+        self.rate_limiter = None
+
+    def _request(self, upstream: str, method: str, url: str, timeout, **kwargs) -> requests.Response:
+        """
+        Send a request through the upstream's circuit breaker with a timeout.
+        
+        Raises:
+            requests.exceptions.RequestException: On failure, including
+                CircuitOpenError wrapped as a ConnectionError when the circuit is open
+        """
+        breaker = self.breakers[upstream]
+        try:
+            trial = breaker.before_call()
+        except CircuitOpenError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        try:
+            if upstream == 'tmdb' and self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            response = requests.request(method, url, timeout=timeout, **kwargs)
+            if response.status_code >= 500 or response.status_code == 429:
+                response.raise_for_status()
+        except requests.exceptions.RequestException:
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            breaker.end_call(trial)
+        return response
+
+    def _tmdb_get(self, url: str, params: dict = None) -> requests.Response:
+        return self._request('tmdb', 'GET', url, self.tmdb_timeout, headers=self.headers, params=params)
+
+    def breaker_states(self) -> Dict[str, Dict]:
+        """Circuit breaker state per upstream, for monitoring"""
+        return {name: breaker.state() for name, breaker in self.breakers.items()}
 
     def get_actor_image_url(self, actor_name):
         """
@@ -41,13 +89,17 @@ class MovieDataService:
             
         Returns:
             str: The complete URL of the actor's profile image, or None if not found
+                or the image search is unavailable (the page shows a placeholder)
         """
+        # bs4 is only needed here, so keep it out of worker boot
+        from bs4 import BeautifulSoup
+        
         def search_image_urls(query, num_images=5):
             search_url = f"https://www.google.com/search?q={query}&tbm=isch"
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"}
             
-            response = requests.get(search_url, headers=headers)
+            response = self._request('google_images', 'GET', search_url, self.image_search_timeout, headers=headers)
             soup = BeautifulSoup(response.text, 'html.parser')
             
             image_urls = []
@@ -56,9 +108,13 @@ class MovieDataService:
                 if img_url and img_url.startswith("http"):
                     image_urls.append(img_url)
 
-            return image_urls[0]
+            return image_urls[0] if image_urls else None
         
-        return search_image_urls(actor_name)
+        try:
+            return search_image_urls(actor_name)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Image search unavailable for {actor_name}: {e}")
+            return None
    
     @lru_cache(maxsize=100)
     def get_actor_movies(self, actor_name: str) -> List[str]:
@@ -78,7 +134,7 @@ class MovieDataService:
             # Search for the actor
             search_url = f"{self.base_url}/search/person"
             params = {"query": actor_name}
-            response = requests.get(search_url, headers=self.headers, params=params)
+            response = self._tmdb_get(search_url, params=params)
             response.raise_for_status()
             
             results = response.json().get("results", [])
@@ -89,7 +145,7 @@ class MovieDataService:
             
             # Get actor's movie credits
             credits_url = f"{self.base_url}/person/{actor_id}/movie_credits"
-            response = requests.get(credits_url, headers=self.headers)
+            response = self._tmdb_get(credits_url)
             response.raise_for_status()
             
             movie_credits = response.json().get("cast", [])
@@ -100,7 +156,10 @@ class MovieDataService:
                 if credit.get("order", 999) <= 3:  # Only include movies where actor had a major role
                     # Get full movie details
                     movie_url = f"{self.base_url}/movie/{credit['id']}"
-                    response = requests.get(movie_url, headers=self.headers)
+                    try:
+                        response = self._tmdb_get(movie_url)
+                    except requests.exceptions.RequestException:
+                        continue
                     if response.status_code == 200:
                         movie_details = response.json()
                         if movie_details.get("revenue", 0) > 0:
@@ -140,7 +199,7 @@ class MovieDataService:
                 "page": 1
             }
             
-            response = requests.get(search_url, headers=self.headers, params=params)
+            response = self._tmdb_get(search_url, params=params)
             response.raise_for_status()
             
             results = response.json().get("results", [])
@@ -170,7 +229,7 @@ class MovieDataService:
             # Search for the actor
             search_url = f"{self.base_url}/search/person"
             params = {"query": actor_name}
-            response = requests.get(search_url, headers=self.headers, params=params)
+            response = self._tmdb_get(search_url, params=params)
             response.raise_for_status()
             
             results = response.json().get("results", [])
@@ -181,7 +240,7 @@ class MovieDataService:
             
             # Get actor's movie credits
             credits_url = f"{self.base_url}/person/{actor_id}/movie_credits"
-            response = requests.get(credits_url, headers=self.headers)
+            response = self._tmdb_get(credits_url)
             response.raise_for_status()
             
             movie_credits = response.json().get("cast", [])
@@ -201,7 +260,7 @@ class MovieDataService:
                         ):
                             valid_movies.append(movie_details)
                     except Exception as e:
-                        print(f"Error fetching details for movie {credit['id']}: {e}")
+                        logger.error(f"Error fetching details for movie {credit['id']}: {e}")
                         continue
             
             # Sort by revenue and get top 5
@@ -215,7 +274,7 @@ class MovieDataService:
         """Get full movie details by ID"""
         try:
             movie_url = f"{self.base_url}/movie/{movie_id}"
-            response = requests.get(movie_url, headers=self.headers)
+            response = self._tmdb_get(movie_url)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -237,9 +296,11 @@ class MovieDataService:
             TMDBError: If request fails
         """
         try:
-            response = requests.request(
-                method=method,
-                url=url,
+            response = self._request(
+                'tmdb',
+                method,
+                url,
+                self.tmdb_timeout,
                 headers=self.headers,
                 params=params
             )
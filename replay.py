@@ -0,0 +1,148 @@
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from db_service import actor_rosters
+from events import read_events
+from game_rules import GuessError, apply_guess, new_game_state
+from typing import Dict, Iterable, Iterator, List
+import argparse
+import json
+import os
+import time
+from dotenv import load_dotenv
+
+MAX_CHANGED_GAMES = 50  # Games listed individually in the report
+
+
+def load_games(events: Iterable[Dict]) -> Iterator[Dict]:
+    """Group events into recorded games, in start order"""
+    games = {}
+    for event in events:
+        game_id = event.get('g')
+        if not game_id:
+            continue
+        kind = event.get('e')
+        if kind == 'start':
+            games[game_id] = {'game_id': game_id, 'actor_id': event.get('a'), 'actor_name': event.get('n'),
+                              'roster': event.get('m', []), 'guesses': [], 'end': None}
+        elif game_id not in games:
+            continue  # Started before the oldest log we have
+        elif kind == 'guess':
+            games[game_id]['guesses'].append(str(event.get('m')))
+        elif kind == 'end':
+            games[game_id]['end'] = event
+    return iter(games.values())
+
+
+def current_rosters(engine: Engine, actor_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+    """Each actor's roster as the game would deal it from the catalog today"""
+    with engine.connect() as conn:
+        return actor_rosters(conn, actor_ids)
+
+
+def replay_game(game: Dict, roster: List[Dict]) -> Dict:
+    """Re-score a recorded game's guesses against a roster with the live rules"""
+    state = new_game_state(roster)
+    by_id = {str(movie['id']): movie for movie in roster}
+    unplayed = 0
+    for movie_id in game['guesses']:
+        details = by_id.get(movie_id) or {'id': movie_id, 'title': None, 'release_date': None,
+                                          'revenue': 0, 'poster_path': None}
+        try:
+            apply_guess(state, movie_id, details)
+        except GuessError:
+            unplayed += 1
+    found = len(state['guessed_movies'])
+    return {
+        'found': found,
+        'strikes': state['strikes'],
+        'finished': state['game_over'],
+        'won': state['game_over'] and found == len(roster),
+        'unplayed': unplayed,
+    }
+
+
+def replay(games: Iterable[Dict], engine: Engine) -> Dict:
+    """
+    Re-score recorded games against the current catalog in bulk.
+
+    Args:
+        games: Games from ``load_games``
+        engine: Catalog database
+
+    Returns:
+        Dict: Totals, before/after averages for finished games and the games
+        whose outcome changed
+    """
+    start = time.perf_counter()
+    games = list(games)
+    rosters = current_rosters(engine, (game['actor_id'] for game in games if game['actor_id'] is not None))
+
+    totals = {'games': len(games), 'replayed': 0, 'missing_actor': 0, 'roster_changed': 0,
+              'outcome_changed': 0, 'won_before': 0, 'won_after': 0}
+    found_before = found_after = finished = 0
+    changed = []
+
+    for game in games:
+        roster = rosters.get(game['actor_id'])
+        if not roster:
+            totals['missing_actor'] += 1
+            continue
+        totals['replayed'] += 1
+        if sorted(str(movie['id']) for movie in roster) != sorted(str(m) for m in game['roster']):
+            totals['roster_changed'] += 1
+
+        result = replay_game(game, roster)
+        end = game['end']
+        if not end:
+            continue  # Abandoned games have no recorded outcome to compare
+        finished += 1
+        totals['won_after'] += 1 if result['won'] else 0
+        found_before += end.get('f', 0)
+        found_after += result['found']
+        totals['won_before'] += 1 if end.get('won') else 0
+        if bool(end.get('won')) != result['won'] or end.get('f', 0) != result['found']:
+            totals['outcome_changed'] += 1
+            if len(changed) < MAX_CHANGED_GAMES:
+                changed.append({
+                    'game_id': game['game_id'],
+                    'actor_name': game['actor_name'],
+                    'before': {'won': bool(end.get('won')), 'found': end.get('f', 0), 'strikes': end.get('s', 0)},
+                    'after': {key: result[key] for key in ('won', 'found', 'strikes')},
+                })
+
+    return {
+        **totals,
+        'avg_found_before': round(found_before / finished, 2) if finished else None,
+        'avg_found_after': round(found_after / finished, 2) if finished else None,
+        'changed_games': changed,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Re-score recorded games against the current catalog")
+    parser.add_argument('log_dir', nargs='?', default=os.getenv('EVENT_LOG_DIR', 'events'))
+    parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in environment")
+    report = replay(load_games(read_events(args.log_dir)), create_engine(database_url))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Replayed {report['replayed']} of {report['games']} games in {report['seconds']}s "
+          f"({report['missing_actor']} actors no longer in the catalog)")
+    print(f"  rosters changed: {report['roster_changed']}")
+    print(f"  outcomes changed: {report['outcome_changed']}")
+    print(f"  wins: {report['won_before']} recorded, {report['won_after']} on replay")
+    print(f"  avg movies found: {report['avg_found_before']} recorded, {report['avg_found_after']} on replay")
+    for game in report['changed_games'][:20]:
+        print(f"  {game['game_id']} ({game['actor_name']}): {game['before']} -> {game['after']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,14 @@
 
 echo "Resetting database..."
 
-# Clear connections, drop and recreate database, then initialize
-sudo -u postgres psql -c "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = 'movie_game' AND pid <> pg_backend_pid();" -c "DROP DATABASE IF EXISTS movie_game;" -c "CREATE DATABASE movie_game;" && python db_init.py
+# Restore from a snapshot when one is given, otherwise recrawl TMDB
+if [ -n "$1" ]; then
+    POPULATE=(python snapshot.py import "$1")
+else
+    POPULATE=(python db_init.py)
+fi
 
-echo "Database reset complete!" 
\ No newline at end of file
+# Clear connections, drop and recreate database, then populate
+sudo -u postgres psql -c "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = 'movie_game' AND pid <> pg_backend_pid();" -c "DROP DATABASE IF EXISTS movie_game;" -c "CREATE DATABASE movie_game;" && "${POPULATE[@]}"
+
+echo "Database reset complete!"
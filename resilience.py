@@ -0,0 +1,98 @@
+from typing import Dict
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately for ``reset_timeout`` seconds. One trial call is then
+    let through (half-open); success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._counters = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def before_call(self) -> bool:
+        """
+        Reserve a call, raising CircuitOpenError if the upstream should be skipped.
+
+        Returns:
+            bool: True if this call is the half-open trial; pass it to
+            ``end_call`` once the call is over
+        """
+        with self._lock:
+            self._counters['calls'] += 1
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == OPEN or (self._state == HALF_OPEN and self._trial_in_flight):
+                self._counters['rejected'] += 1
+                raise CircuitOpenError(f"Circuit open for {self.name}")
+            if self._state == HALF_OPEN:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def end_call(self, trial: bool) -> None:
+        """
+        Free the half-open trial if the call ended without recording an outcome.
+
+        Call from a ``finally`` so an unexpected exception cannot leave the
+        breaker half-open with a trial that never finishes.
+        """
+        if not trial:
+            return
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counters['failures'] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._counters['opened'] += 1
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def state(self) -> Dict:
+        """Current state and counters for monitoring"""
+        with self._lock:
+            state = self._state
+            if state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                state = HALF_OPEN
+            return dict(self._counters, state=state, consecutive_failures=self._failures)
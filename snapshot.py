@@ -0,0 +1,225 @@
+from sqlalchemy import create_engine, select, text, Integer, BigInteger, Float, DateTime
+from sqlalchemy.engine import Engine
+from models import Base, CATALOG_TABLES, upgrade_schema
+from datetime import datetime, UTC
+from typing import Dict, List, IO
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import tarfile
+import tempfile
+import time
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+INSERT_BATCH_SIZE = 5000
+
+
+def get_engine() -> Engine:
+    """Create an engine for DATABASE_URL"""
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in environment")
+    return create_engine(database_url)
+
+
+def _quoted_columns(table) -> str:
+    return ', '.join(f'"{column.name}"' for column in table.columns)
+
+
+def _write_table_csv(conn, table, out: IO[bytes]) -> int:
+    """Write one table as CSV with a header row, returning the row count"""
+    if conn.dialect.name == 'postgresql':
+        cursor = conn.connection.cursor()
+        wrapper = io.TextIOWrapper(out, encoding='utf-8', newline='')
+        cursor.copy_expert(
+            f'COPY {table.name} ({_quoted_columns(table)}) TO STDOUT WITH (FORMAT csv, HEADER true)',
+            wrapper
+        )
+        wrapper.detach()
+        # Rows COPY actually wrote, so the manifest can't disagree with the CSV
+        return cursor.rowcount
+
+    wrapper = io.TextIOWrapper(out, encoding='utf-8', newline='')
+    writer = csv.writer(wrapper)
+    writer.writerow([column.name for column in table.columns])
+    rows = 0
+    for row in conn.execute(select(table)):
+        writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+        rows += 1
+    wrapper.flush()
+    wrapper.detach()
+    return rows
+
+
+def export_snapshot(engine: Engine, path: str) -> Dict:
+    """
+    Dump the catalog tables to a gzip-compressed tar of CSV files.
+
+    Args:
+        engine: Source database engine
+        path (str): Output file, conventionally ``*.tar.gz``
+
+    Returns:
+        Dict: The manifest written into the snapshot
+    """
+    start = time.perf_counter()
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'created_at': datetime.now(UTC).isoformat(),
+        'tables': {}
+    }
+
+    # One repeatable-read transaction, so every table comes from the same point in time
+    isolation = {'isolation_level': 'REPEATABLE READ'} if engine.dialect.name == 'postgresql' else {}
+    with engine.connect().execution_options(**isolation) as conn, conn.begin(), \
+            tarfile.open(path, 'w:gz') as tar:
+        for name in CATALOG_TABLES:
+            table = Base.metadata.tables[name]
+            with tempfile.TemporaryFile() as tmp:
+                rows = _write_table_csv(conn, table, tmp)
+                info = tarfile.TarInfo(f'{name}.csv')
+                info.size = tmp.tell()
+                info.mtime = int(time.time())
+                tmp.seek(0)
+                tar.addfile(info, tmp)
+            manifest['tables'][name] = {
+                'rows': rows,
+                'columns': [column.name for column in table.columns]
+            }
+            logger.info(f"Exported {rows} rows from {name}")
+
+        data = json.dumps(manifest, indent=2).encode('utf-8')
+        info = tarfile.TarInfo('manifest.json')
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+
+    logger.info(f"Snapshot written to {path} in {time.perf_counter() - start:.2f}s")
+    return manifest
+
+
+def _parse_value(column, value: str):
+    """Convert a CSV field back to the column's Python type"""
+    if value == '':
+        return None
+    if isinstance(column.type, (Integer, BigInteger)):
+        return int(value)
+    if isinstance(column.type, Float):
+        return float(value)
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _load_table_csv(conn, table, stream: IO[bytes]) -> int:
+    """Bulk-load one CSV member into an empty table, returning the row count"""
+    reader_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+    if conn.dialect.name == 'postgresql':
+        header = next(csv.reader([reader_stream.readline()]))
+        columns = ', '.join(f'"{name}"' for name in header)
+        cursor = conn.connection.cursor()
+        cursor.copy_expert(f'COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)', reader_stream)
+        return cursor.rowcount
+
+    reader = csv.reader(reader_stream)
+    header = next(reader)
+    columns = [table.columns[name] for name in header]
+    rows = 0
+    batch: List[Dict] = []
+    for record in reader:
+        batch.append({column.name: _parse_value(column, value) for column, value in zip(columns, record)})
+        if len(batch) >= INSERT_BATCH_SIZE:
+            conn.execute(table.insert(), batch)
+            rows += len(batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+        rows += len(batch)
+    return rows
+
+
+def import_snapshot(engine: Engine, path: str) -> Dict:
+    """
+    Replace the catalog tables with the contents of a snapshot.
+
+    Secondary indexes are dropped before the load and rebuilt afterwards, so
+    the rows go in with no per-row index maintenance.
+
+    Args:
+        engine: Target database engine
+        path (str): Snapshot created by ``export_snapshot``
+
+    Returns:
+        Dict: The snapshot manifest
+    """
+    start = time.perf_counter()
+    Base.metadata.create_all(engine)
+    upgrade_schema(engine)
+
+    tables = [Base.metadata.tables[name] for name in CATALOG_TABLES]
+    indexes = [index for table in tables for index in table.indexes]
+
+    with tarfile.open(path, 'r:gz') as tar, engine.begin() as conn:
+        manifest = json.load(tar.extractfile('manifest.json'))
+        if manifest.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+
+        for index in indexes:
+            index.drop(bind=conn, checkfirst=True)
+
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(f"TRUNCATE {', '.join(reversed(CATALOG_TABLES))}"))
+        else:
+            for table in reversed(tables):
+                conn.execute(table.delete())
+
+        for table in tables:
+            rows = _load_table_csv(conn, table, tar.extractfile(f'{table.name}.csv'))
+            expected = manifest['tables'][table.name]['rows']
+            if rows != expected:
+                raise ValueError(f"Loaded {rows} rows into {table.name}, snapshot has {expected}")
+            logger.info(f"Loaded {rows} rows into {table.name}")
+
+        index_start = time.perf_counter()
+        for index in indexes:
+            index.create(bind=conn)
+        logger.info(f"Built {len(indexes)} indexes in {time.perf_counter() - index_start:.2f}s")
+
+        conn.execute(text('ANALYZE'))
+
+    logger.info(f"Snapshot {path} restored in {time.perf_counter() - start:.2f}s")
+    return manifest
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export or restore a catalog snapshot")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help="Dump actors, movies and actor_movies")
+    export_parser.add_argument('path')
+    import_parser = subparsers.add_parser('import', help="Replace the catalog with a snapshot")
+    import_parser.add_argument('path')
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if args.command == 'export':
+        export_snapshot(engine, args.path)
+    else:
+        import_snapshot(engine, args.path)
+
+
+if __name__ == "__main__":
+    main()
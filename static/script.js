@@ -1,118 +1,321 @@
-document.addEventListener('DOMContentLoaded', function() {
-    const searchInput = document.getElementById('movie-search');
-    const searchResults = document.getElementById('search-results');
-    let searchTimeout;
+let searchTimeout = null;
+const movieSearch = document.getElementById("movieSearch");
+const movieDropdown = document.getElementById("movieDropdown");
+const messageDiv = document.getElementById("message");
 
-    searchInput.addEventListener('input', function() {
-        clearTimeout(searchTimeout);
-        const query = this.value.trim();
-        
-        if (query.length < 2) {
-            searchResults.innerHTML = '';
-            return;
+// initialState is rendered into the page by home.html
+let gameState = {
+    strikes: initialState.strikes,
+    gameOver: initialState.gameOver,
+    guessedMovies: new Set(),
+    maxRevenue: initialState.maxRevenue
+};
+
+function showMessage(text, type) {
+    messageDiv.textContent = text;
+    messageDiv.className = `message ${type} show`;
+    setTimeout(() => {
+        messageDiv.classList.remove('show');
+    }, 3000);
+}
+
+function updateStrikes(count) {
+    for (let i = 1; i <= 3; i++) {
+        const strike = document.getElementById(`strike-${i}`);
+        if (i <= count) {
+            strike.classList.add('active');
+        } else {
+            strike.classList.remove('active');
         }
+    }
+}
 
-        searchTimeout = setTimeout(() => {
-            fetch(`/search_movies?q=${encodeURIComponent(query)}`)
-                .then(response => response.json())
-                .then(movies => {
-                    searchResults.innerHTML = movies.map(movie => `
-                        <div class="search-result" onclick="submitGuess(${movie.id})">
-                            ${movie.title} (${movie.year})
-                        </div>
-                    `).join('');
-                });
-        }, 300);
+function addGuessedMovie(movie, true_rank) {
+    const guessedMoviesContainer = document.querySelector('.guessed-movies');
+    
+    // Create new movie card
+    const movieCard = document.createElement('div');
+    movieCard.className = 'movie-card';
+    
+    // Get all existing movies and the new one
+    const allMovies = [...guessedMoviesContainer.children].map(card => {
+        const rankElement = card.querySelector('.rank-number');
+        const medalElement = card.querySelector('.medal');
+        let rank;
+        
+        if (rankElement) {
+            rank = parseInt(rankElement.textContent.replace('#', ''));
+        } else if (medalElement) {
+            const medalText = medalElement.textContent;
+            if (medalText === '🥇') rank = 1;
+            else if (medalText === '🥈') rank = 2;
+            else if (medalText === '🥉') rank = 3;
+        }
+        
+        return {
+            element: card,
+            revenue: parseFloat(card.querySelector('.revenue-text').textContent.replace(/[^0-9.]/g, '')) * 1000000,
+            rank: rank
+        };
     });
-
-    // Close search results when clicking outside
-    document.addEventListener('click', function(e) {
-        if (!searchResults.contains(e.target) && e.target !== searchInput) {
-            searchResults.innerHTML = '';
+    
+    // Add new movie
+    allMovies.push({
+        element: null,
+        revenue: movie.revenue,
+        rank: true_rank
+    });
+    
+    // Sort by rank
+    allMovies.sort((a, b) => a.rank - b.rank);
+    
+    // Clear container
+    guessedMoviesContainer.innerHTML = '';
+    
+    // Add all movies back in correct order
+    allMovies.forEach(item => {
+        if (item.element === null) {
+            // This is the new movie
+            let rankHtml = '';
+            if (true_rank === 1) {
+                rankHtml = '<span class="medal gold">🥇</span>';
+            } else if (true_rank === 2) {
+                rankHtml = '<span class="medal silver">🥈</span>';
+            } else if (true_rank === 3) {
+                rankHtml = '<span class="medal bronze">🥉</span>';
+            } else {
+                rankHtml = `<span class="rank-number">#${true_rank}</span>`;
+            }
+            
+            movieCard.innerHTML = `
+                <div class="movie-rank">${rankHtml}</div>
+                <img class="movie-poster" 
+                     src="${movie.poster_url || '/static/placeholder.png'}" 
+                     alt="${movie.title}">
+                <div class="movie-info">
+                    <div class="movie-title">${movie.title}</div>
+                    <div class="movie-year">${movie.release_date.slice(0,4)}</div>
+                    <div class="revenue-bar-container">
+                        <div class="revenue-bar" style="width: ${(movie.revenue / gameState.maxRevenue * 100)}%"></div>
+                    </div>
+                    <div class="revenue-text">$${(movie.revenue / 1000000).toFixed(0)}M</div>
+                </div>
+            `;
+            guessedMoviesContainer.appendChild(movieCard);
+        } else {
+            guessedMoviesContainer.appendChild(item.element);
         }
     });
-});
+    
+    gameState.guessedMovies.add(movie.id);
+}
 
-function submitGuess(movieId) {
-    fetch('/submit_guess', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ movie_id: movieId })
-    })
-    .then(response => {
-        if (!response.ok) {
-            return response.json().then(err => Promise.reject(err));
-        }
-        return response.json();
-    })
-    .then(data => {
-        // Clear search
-        document.getElementById('movie-search').value = '';
-        document.getElementById('search-results').innerHTML = '';
-
-        if (data.error) {
+async function submitGuess(movieId, movieTitle) {
+    if (gameState.gameOver) {
+        showMessage('Game is already over!', 'error');
+        return;
+    }
+
+    if (gameState.guessedMovies.has(movieId)) {
+        showMessage('You already guessed this movie!', 'error');
+        return;
+    }
+
+    try {
+        const response = await fetch('/submit_guess', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ movie_id: movieId })
+        });
+
+        const data = await response.json();
+        
+        if (response.ok) {
+            handleGuessResponse(data);
+        } else {
             showMessage(data.error, 'error');
-            return;
         }
-
-        // Update UI
-        updateGameState(data);
-        showMessage(data.message, data.correct ? 'success' : 'error');
-    })
-    .catch(error => {
+    } catch (error) {
         console.error('Error:', error);
-        showMessage(error.error || 'Error submitting guess', 'error');
-    });
+        showMessage('Error submitting guess', 'error');
+    }
+
+    movieSearch.value = '';
+    movieDropdown.style.display = 'none';
 }
 
-function showMessage(text, type) {
-    const messageDiv = document.getElementById('message');
-    messageDiv.textContent = text;
-    messageDiv.className = `message ${type} show`;
-    setTimeout(() => {
-        messageDiv.classList.remove('show');
-    }, 3000);
+function handleGuessResponse(data) {
+    updateStrikes(data.strikes);
+    showMessage(data.message, data.correct ? 'success' : 'error');
+
+    if (data.correct) {
+        const latestMovie = data.guessed_movies[data.guessed_movies.length - 1];
+        addGuessedMovie(latestMovie, data.true_rank);
+    }
+
+    if (data.game_over) {
+        gameState.gameOver = true;
+        
+        if (data.correct) {
+            // Win condition
+            const winModal = document.getElementById('winModal');
+            const rankedMoviesDiv = document.querySelector('#winModal .ranked-movies');
+            rankedMoviesDiv.innerHTML = data.guessed_movies.map((movie, index) => {
+                let rankHtml = '';
+                if (index === 0) {
+                    rankHtml = '<span class="medal gold">🥇</span>';
+                } else if (index === 1) {
+                    rankHtml = '<span class="medal silver">🥈</span>';
+                } else if (index === 2) {
+                    rankHtml = '<span class="medal bronze">🥉</span>';
+                } else {
+                    rankHtml = `<span class="rank-number">#${index + 1}</span>`;
+                }
+                
+                return `
+                    <div class="movie-card">
+                        <div class="movie-rank">${rankHtml}</div>
+                        <img class="movie-poster" 
+                             src="${movie.poster_url || '/static/placeholder.png'}" 
+                             alt="${movie.title}">
+                        <div class="movie-info">
+                            <div class="movie-title">${movie.title}</div>
+                            <div class="movie-year">${movie.release_date.slice(0,4)}</div>
+                            <div class="revenue-bar-container">
+                                <div class="revenue-bar" style="width: ${(movie.revenue / data.highest_revenue * 100)}%"></div>
+                            </div>
+                            <div class="revenue-text">$${(movie.revenue / 1000000).toFixed(0)}M</div>
+                        </div>
+                    </div>
+                `;
+            }).join('');
+            
+            winModal.style.display = 'flex';
+        } else {
+            // Loss condition - show the lose modal with correct movies
+            const loseModal = document.getElementById('loseModal');
+            const correctMoviesDiv = document.getElementById('correctMovies');
+            
+            // Display all correct movies that weren't found, sorted by revenue
+            correctMoviesDiv.innerHTML = data.correct_movies.map((movie, index) => {
+                let rankHtml = '';
+                if (index === 0) {
+                    rankHtml = '<span class="medal gold">🥇</span>';
+                } else if (index === 1) {
+                    rankHtml = '<span class="medal silver">🥈</span>';
+                } else if (index === 2) {
+                    rankHtml = '<span class="medal bronze">🥉</span>';
+                } else {
+                    rankHtml = `<span class="rank-number">#${index + 1}</span>`;
+                }
+
+                return `
+                    <div class="movie-card">
+                        <div class="movie-rank">${rankHtml}</div>
+                        <img class="movie-poster" 
+                             src="${movie.poster_url || '/static/placeholder.png'}" 
+                             alt="${movie.title}">
+                        <div class="movie-info">
+                            <div class="movie-title">${movie.title}</div>
+                            <div class="movie-year">${movie.release_date.slice(0,4)}</div>
+                            <div class="revenue-bar-container">
+                                <div class="revenue-bar" style="width: ${(movie.revenue / data.highest_revenue * 100)}%"></div>
+                            </div>
+                            <div class="revenue-text">$${(movie.revenue / 1000000).toFixed(0)}M</div>
+                        </div>
+                    </div>
+                `;
+            }).join('');
+            
+            loseModal.style.display = 'flex';
+        }
+    }
 }
 
-function updateGameState(data) {
-    // Update strikes with animation
-    const strikes = document.querySelectorAll('.strike');
-    strikes.forEach((strike, index) => {
-        if (index < data.strikes) {
-            strike.classList.add('active');
+async function startNewGame() {
+    try {
+        const response = await fetch('/start_game');
+        const data = await response.json();
+        
+        if (response.ok) {
+            location.reload();  // Refresh the page for new game
+        } else {
+            showMessage(data.error, 'error');
         }
-    });
+    } catch (error) {
+        console.error('Error:', error);
+        showMessage('Error starting new game', 'error');
+    }
+}
 
-    if (data.correct) {
-        // Add the new movie to the display without refreshing
-        const guessedMoviesContainer = document.querySelector('.guessed-movies');
-        const movieCard = document.createElement('div');
-        movieCard.className = 'movie-card';
+movieSearch.addEventListener('input', function(e) {
+    const query = e.target.value.trim();
+    
+    if (searchTimeout) {
+        clearTimeout(searchTimeout);
+    }
+    
+    if (!query) {
+        movieDropdown.style.display = "none";
+        return;
+    }
+    
+    searchTimeout = setTimeout(() => {
+        fetchMovieSuggestions(query);
+    }, 250);
+});
+
+async function fetchMovieSuggestions(query) {
+    try {
+        const response = await fetch(`/search_movies?q=${encodeURIComponent(query)}`);
+        const movies = await response.json();
         
-        const latestMovie = data.guessed_movies[data.guessed_movies.length - 1];
-        movieCard.innerHTML = `
-            <img class="movie-poster" 
-                 src="${latestMovie.poster_path ? 
-                      'https://image.tmdb.org/t/p/w200' + latestMovie.poster_path : 
-                      '/static/placeholder.png'}" 
-                 alt="${latestMovie.title}">
-            <div class="movie-info">
-                <div class="movie-title">${latestMovie.title}</div>
-                <div class="movie-year">${latestMovie.release_date.slice(0,4)}</div>
-                <div class="revenue-bar-container">
-                    <div class="revenue-bar" style="width: ${(latestMovie.revenue / data.highest_revenue * 100)}%"></div>
-                </div>
-                <div class="revenue-text">$${(latestMovie.revenue / 1000000).toFixed(0)}M</div>
-            </div>
+        if (response.ok) {
+            displayMovieSuggestions(movies);
+        } else {
+            console.error('Error:', movies.error);
+        }
+    } catch (error) {
+        console.error('Error fetching suggestions:', error);
+    }
+}
+
+function displayMovieSuggestions(movies) {
+    movieDropdown.innerHTML = '';
+    
+    if (movies.length === 0) {
+        movieDropdown.style.display = "none";
+        return;
+    }
+    
+    movies.forEach(movie => {
+        const div = document.createElement('div');
+        div.className = 'movie-suggestion';
+        div.innerHTML = `
+            <span class="movie-title">${movie.title}</span>
+            <span class="movie-year">${movie.year}</span>
         `;
         
-        guessedMoviesContainer.appendChild(movieCard);
-    }
+        div.addEventListener('click', () => {
+            submitGuess(movie.id, movie.title);
+        });
+        
+        movieDropdown.appendChild(div);
+    });
+    
+    movieDropdown.style.display = "block";
+}
 
-    // Only refresh if game is over
-    if (data.game_over) {
-        location.reload();
+// Close dropdown when clicking outside
+document.addEventListener('click', function(e) {
+    if (!movieSearch.contains(e.target)) {
+        movieDropdown.style.display = "none";
     }
-} 
\ No newline at end of file
+});
+
+// Initialize strikes if game is in progress
+if (gameState.strikes > 0) {
+    updateStrikes(gameState.strikes);
+}
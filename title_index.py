@@ -0,0 +1,137 @@
+from collections import defaultdict
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import time
+import unicodedata
+
+MAX_CANDIDATES = 200  # Titles passed from n-gram overlap to edit-distance ranking
+COMMON_GRAM_POSTINGS = 2000  # Trigrams in more titles than this are skipped once rarer ones matched
+DEFAULT_BUDGET = 0.02  # Seconds allowed per query
+
+
+def normalize(title: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace"""
+    text = unicodedata.normalize('NFKD', title)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return ' '.join(re.sub(r"[^a-z0-9 ]+", ' ', text).split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal-string-alignment distance (edits plus adjacent swaps), giving up
+    early once every path exceeds ``limit``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class TitleIndex:
+    """
+    Approximate title search over the catalog.
+
+    Candidates come from trigram overlap, then are ranked by edit distance
+    against the whole title and against runs of its words, so "avngers"
+    matches "Avengers: Endgame" as well as "The Avengers".
+    """
+
+    def __init__(self, movies: Iterable[Tuple[int, str, Optional[int]]]):
+        """
+        Args:
+            movies: (TMDB ID, title, release year) rows
+        """
+        self.ids: List[int] = []
+        self.titles: List[str] = []
+        self.years: List[Optional[int]] = []
+        self.normalized: List[str] = []
+        self.words: List[List[str]] = []
+        postings = defaultdict(list)
+        for tmdb_id, title, year in movies:
+            doc = len(self.ids)
+            normalized = normalize(title or '')
+            self.ids.append(tmdb_id)
+            self.titles.append(title)
+            self.years.append(year)
+            self.normalized.append(normalized)
+            self.words.append(normalized.split())
+            for gram in trigrams(normalized):
+                postings[gram].append(doc)
+        self.postings: Dict[str, List[int]] = dict(postings)
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _distance(self, query: str, doc: int, limit: int) -> int:
+        best = bounded_distance(query, self.normalized[doc], limit)
+        words = self.words[doc]
+        query_words = len(query.split())
+        for size in {max(query_words - 1, 1), query_words, query_words + 1}:
+            for start in range(0, max(len(words) - size + 1, 0)):
+                if best == 0:
+                    return 0
+                window = ' '.join(words[start:start + size])
+                best = min(best, bounded_distance(query, window, min(best, limit)))
+        return best
+
+    def search(self, query: str, limit: int = 10, budget: float = DEFAULT_BUDGET) -> List[Dict]:
+        """
+        Ranked suggestions for a possibly misspelled query.
+
+        Args:
+            query (str): Search text
+            limit (int): Maximum results
+            budget (float): Seconds after which ranking stops with what it has
+
+        Returns:
+            List[Dict]: Movies in the same shape as ``DatabaseService.search_movies``
+        """
+        deadline = time.perf_counter() + budget
+        normalized = normalize(query)
+        if len(normalized) < 2:
+            return []
+
+        # Rarest grams first, so common ones like " th" are only counted when nothing rarer matched
+        overlap = defaultdict(int)
+        grams = sorted(trigrams(normalized), key=lambda gram: len(self.postings.get(gram, ())))
+        for gram in grams:
+            postings = self.postings.get(gram, ())
+            if overlap and (len(postings) > COMMON_GRAM_POSTINGS or time.perf_counter() > deadline):
+                break
+            for doc in postings:
+                overlap[doc] += 1
+        candidates = heapq.nlargest(MAX_CANDIDATES, overlap, key=overlap.get)
+
+        max_edits = max(1, len(normalized) // 3)
+        ranked = []
+        for doc in candidates:
+            if time.perf_counter() > deadline:
+                break
+            distance = self._distance(normalized, doc, max_edits)
+            if distance <= max_edits:
+                ranked.append((distance, -overlap[doc], len(self.normalized[doc]), doc))
+        ranked.sort()
+
+        return [{
+            'id': self.ids[doc],
+            'title': self.titles[doc],
+            'year': str(self.years[doc]) if self.years[doc] else 'N/A'
+        } for _, _, _, doc in ranked[:limit]]
@@ -1,9 +1,17 @@
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, func, select
 from sqlalchemy.orm import sessionmaker
-from models import Actor, Movie, Base
+from models import Actor, Movie, Base, missing_schema, upgrade_schema
+from actor_stats import MIN_MOVIE_CREDITS, MIN_ENGLISH_RATIO, STATS_MAX_AGE, compute_english_ratio, stored_actor, is_qualified
 from movie_data import MovieDataService
+from catalog import build_catalog
+from actor_features import build_actor_features
+from movie_cache import build_movie_cache
+from api_plan import (ApiPlan, TRENDING, CREDITS, LANGUAGE, DEFAULT_SAMPLE_SIZE, has_english_majority,
+                      sample_credits, add_roster_fetches, format_plan, stored_data_usable)
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
+import argparse
+import json
 import logging
 from dotenv import load_dotenv
 import os
@@ -21,9 +29,17 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 class DatabaseUpdater:
-    def __init__(self):
+    def __init__(self, dry_run: bool = False):
+        """
+        Args:
+            dry_run (bool): Only plan updates; nothing is written, including
+                schema upgrades
+        """
+        self.dry_run = dry_run
         self.engine = create_engine(os.getenv('DATABASE_URL'))
         self.SessionLocal = sessionmaker(bind=self.engine)
+        if not dry_run:
+            upgrade_schema(self.engine)
         self.movie_service = MovieDataService()
         
     def get_trending_actors(self) -> List[Dict]:
@@ -37,6 +53,15 @@ class DatabaseUpdater:
                 if person.get("known_for_department") != "Acting":
                     continue
                     
+                # Known actors already have their credit count stored, unless it is stale
+                with self.SessionLocal() as session:
+                    known_actor = stored_actor(session, person['id'], max_age=STATS_MAX_AGE)
+                    in_catalog = known_actor is not None or session.get(Actor, person['id']) is not None
+                if known_actor:
+                    if is_qualified(known_actor.movie_credit_count, known_actor.english_ratio):
+                        actors.append(person)
+                    continue
+                
                 # Get their movie credits first to check total count
                 movie_credits = self.movie_service.make_request(
                     "GET",
@@ -45,19 +70,14 @@ class DatabaseUpdater:
                 
                 all_movies = movie_credits.get("cast", [])
                 # Skip if they don't have at least 15 movies
-                if len(all_movies) < 15:
+                if len(all_movies) < MIN_MOVIE_CREDITS:
                     logger.info(f"Skipping {person['name']}: Only {len(all_movies)} movies")
                     continue
                 
-                # Check their known_for movies
-                known_for = person.get("known_for", [])
-                english_language_films = [
-                    movie for movie in known_for 
-                    if movie.get("original_language") == "en" and movie.get("media_type") == "movie"
-                ]
-                
-                # Only include actors with majority English language films
-                if len(english_language_films) >= len(known_for) * 0.5:
+                # Only include actors with majority English language films; actors
+                # already in the catalog go through to have their stats refreshed
+                if in_catalog or has_english_majority(person):
+                    person['movie_credits'] = all_movies
                     actors.append(person)
             
             logger.info(f"Found {len(actors)} trending English-language film actors with 15+ movies")
@@ -74,45 +94,44 @@ class DatabaseUpdater:
                 actor = session.query(Actor).filter_by(tmdb_id=actor_data["id"]).first()
                 
                 if not actor:
-                    # Get more detailed actor info including place of birth
-                    actor_details = self.movie_service.make_request(
-                        "GET", 
-                        f"{self.movie_service.base_url}/person/{actor_data['id']}"
-                    )
+                    # Reuse the credits fetched while filtering trending actors
+                    all_movies = actor_data.get('movie_credits')
+                    if all_movies is None:
+                        movie_credits = self.movie_service.make_request(
+                            "GET",
+                            f"{self.movie_service.base_url}/person/{actor_data['id']}/movie_credits"
+                        )
+                        all_movies = movie_credits.get("cast", [])
                     
                     # Skip if we can't verify they work primarily in English-language films
-                    movie_credits = self.movie_service.make_request(
-                        "GET",
-                        f"{self.movie_service.base_url}/person/{actor_data['id']}/movie_credits"
-                    )
-                    
-                    all_movies = movie_credits.get("cast", [])
-                    if all_movies:
-                        # Get language details for their movies
-                        english_movies = 0
-                        total_movies = 0
-                        for movie in all_movies[:20]:  # Check their 20 most recent movies
-                            movie_details = self.movie_service.make_request(
-                                "GET",
-                                f"{self.movie_service.base_url}/movie/{movie['id']}"
-                            )
-                            if movie_details.get("original_language") == "en":
-                                english_movies += 1
-                            total_movies += 1
-                        
-                        # Skip if less than 70% of their recent work is in English
-                        if total_movies > 0 and (english_movies / total_movies) < 0.7:
-                            logger.info(f"Skipping {actor_data['name']}: Insufficient English language films")
-                            return
+                    english_ratio = compute_english_ratio(session, self.movie_service, all_movies)
+                    if english_ratio is not None and english_ratio < MIN_ENGLISH_RATIO:
+                        session.commit()  # Keep the movie languages fetched for the check
+                        logger.info(f"Skipping {actor_data['name']}: Insufficient English language films")
+                        return
                     
                     actor = Actor(
                         tmdb_id=actor_data["id"],
                         name=actor_data["name"],
-                        popularity=actor_data["popularity"]
+                        popularity=actor_data["popularity"],
+                        movie_credit_count=len(all_movies),
+                        english_ratio=english_ratio,
+                        stats_updated_at=datetime.utcnow()
                     )
                     session.add(actor)
                 else:
                     actor.popularity = actor_data["popularity"]
+                    
+                    # Credits are only fetched for known actors whose stats went stale
+                    all_movies = actor_data.get('movie_credits')
+                    if all_movies is not None:
+                        actor.movie_credit_count = len(all_movies)
+                        actor.english_ratio = compute_english_ratio(session, self.movie_service, all_movies)
+                        actor.stats_updated_at = datetime.utcnow()
+                        if actor.english_ratio is not None and actor.english_ratio < MIN_ENGLISH_RATIO:
+                            session.commit()
+                            logger.info(f"Not refreshing {actor.name}: Insufficient English language films")
+                            return
                 
                 # Update last_updated timestamp
                 actor.last_updated = datetime.utcnow()
@@ -130,9 +149,12 @@ class DatabaseUpdater:
                             title=movie_data["title"],
                             release_year=int(movie_data["release_date"][:4]) if movie_data.get("release_date") else None,
                             revenue=movie_data.get("revenue"),
-                            poster_path=movie_data.get("poster_path")
+                            poster_path=movie_data.get("poster_path"),
+                            original_language=movie_data.get("original_language")
                         )
                         session.add(movie)
+                    elif not movie.original_language:
+                        movie.original_language = movie_data.get("original_language")
                     
                     # Ensure movie is associated with actor
                     if movie not in actor.movies:
@@ -164,8 +186,73 @@ class DatabaseUpdater:
                 session.rollback()
                 logger.error(f"Error removing outdated records: {e}")
 
-    def update_database(self) -> None:
-        """Main update function"""
+    def plan_update(self, sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict:
+        """
+        Estimate the TMDB calls and runtime of ``update_database`` without writing.
+
+        The trending list is fetched and compared with stored actors; credits
+        for a few unknown actors are sampled to estimate how many qualify and
+        how many movie lookups each one costs.
+
+        Returns:
+            Dict: ``ApiPlan.report`` for the run
+        """
+        plan = ApiPlan('update_trending')
+        response = plan.fetch(self.movie_service, TRENDING, f"{self.movie_service.base_url}/trending/person/week")
+        plan.add(TRENDING, 1)
+        people = [person for person in response.get("results", []) if person.get("known_for_department") == "Acting"]
+        ids = [person['id'] for person in people]
+        
+        # Read stored stats only if the schema has them; the dry run never upgrades it
+        missing = missing_schema(self.engine)
+        usable = stored_data_usable(plan, missing)
+        with self.SessionLocal() as session:
+            known = {person_id: stored_actor(session, person_id, max_age=STATS_MAX_AGE) if usable else None
+                     for person_id in ids}
+            in_db, outdated = set(), 0
+            if 'actors' not in missing:
+                in_db = set(session.scalars(select(Actor.tmdb_id).where(Actor.tmdb_id.in_(ids))))
+                outdated = session.scalar(
+                    select(func.count()).select_from(Actor)
+                    .where(Actor.last_updated < datetime.utcnow() - timedelta(days=365))
+                )
+            unknown = [person for person in people if not known[person['id']]]
+            sample = sample_credits(plan, session if usable else None, self.movie_service,
+                                    unknown + [person for person in people if known[person['id']]], sample_size)
+        
+        # Known actors are requalified from stored stats; unknown ones cost a credits call
+        qualified_known = sum(1 for actor in known.values()
+                              if actor and is_qualified(actor.movie_credit_count, actor.english_ratio))
+        plan.hit('stored_actor_stats', len(people) - len(unknown))
+        plan.add(CREDITS, len(unknown))
+        
+        # As in get_trending_actors: new actors must pass the known_for pre-filter,
+        # actors already in the catalog go through to have their stats refreshed
+        candidates = [person for person in unknown if person['id'] in in_db or has_english_majority(person)]
+        new_candidates = sum(1 for person in candidates if person['id'] not in in_db)
+        
+        # Candidates with enough credits get a language check, for the movies whose language we do not know
+        checked = len(candidates) * sample['eligible_share']
+        plan.add(LANGUAGE, checked * sample['language_fetches'])
+        plan.hit('known_movie_languages', checked * sample['language_hits'])
+        
+        # Only those that also pass the English ratio get their roster fetched
+        updated = qualified_known + len(candidates) * sample['qualified_share']
+        add_roster_fetches(plan, updated, sample)
+        plan.actors = {
+            'trending': len(people),
+            'known': len(people) - len(unknown),
+            'new_estimate': new_candidates * sample['qualified_share'],
+            'updated_estimate': updated,
+            'outdated_to_remove': outdated,
+        }
+        return plan.report()
+
+    def update_database(self) -> Optional[Dict]:
+        """Main update function; in dry-run mode returns the plan instead"""
+        if self.dry_run:
+            return self.plan_update()
+        
         logger.info("Starting database update")
         
         try:
@@ -179,10 +266,50 @@ class DatabaseUpdater:
             # Clean up old records
             self.remove_outdated_records()
             
-            logger.info("Database update completed successfully")
-            
         except Exception as e:
             logger.error(f"Error during database update: {e}")
+            return
+        
+        failed = self.publish_artifacts()
+        if failed:
+            logger.error(f"Database updated, but could not publish: {', '.join(failed)}")
+        else:
+            logger.info("Database update completed successfully")
+
+    def publish_artifacts(self) -> List[str]:
+        """
+        Rebuild the files game servers read from the updated database.
+
+        Each artifact is built independently, so one failing does not keep
+        the others stale.
+
+        Returns:
+            List[str]: Names of the artifacts that failed to build
+        """
+        results_url = os.getenv('RESULTS_DATABASE_URL')
+        catalog_dir = os.getenv('CATALOG_DIR')
+        steps = [
+            # Recompute difficulty tiers against the updated catalog
+            ('actor features', lambda: build_actor_features(
+                self.engine,
+                os.getenv('ACTOR_FEATURES_PATH', 'actor_features.npz'),
+                create_engine(results_url) if results_url else self.engine
+            )),
+            # Publish a new movie cache version; game workers remap it on their next check
+            ('movie cache', lambda: build_movie_cache(self.engine, os.getenv('MOVIE_CACHE_PATH', 'movie_cache.bin'))),
+        ]
+        if catalog_dir:
+            # Publish a new read-only catalog for game servers
+            steps.insert(1, ('catalog', lambda: build_catalog(self.engine, catalog_dir)))
+        
+        failed = []
+        for name, build in steps:
+            try:
+                build()
+            except Exception as e:
+                logger.error(f"Error building {name}: {e}")
+                failed.append(name)
+        return failed
 
 def run_update():
     """Function to be called by scheduler"""
@@ -190,6 +317,16 @@ def run_update():
     updater.update_database()
 
 def main():
+    parser = argparse.ArgumentParser(description="Weekly trending-actor update")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Print estimated TMDB calls and runtime without updating anything")
+    parser.add_argument('--json', action='store_true', help="Print the dry-run plan as JSON")
+    args = parser.parse_args()
+    if args.dry_run:
+        plan = DatabaseUpdater(dry_run=True).update_database()
+        print(json.dumps(plan, indent=2) if args.json else format_plan(plan))
+        return
+    
     # Create scheduler
     scheduler = BlockingScheduler()
     